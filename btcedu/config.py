@@ -1,3 +1,4 @@
+import functools
 import logging
 import warnings
 
@@ -16,25 +17,28 @@ class Settings(BaseSettings):
     whisper_api_key: str = ""  # falls back to openai_api_key if empty
     claude_api_key: str = ""  # deprecated alias for anthropic_api_key
 
-    @model_validator(mode="after")
-    def _migrate_claude_api_key(self) -> "Settings":
+    @model_validator(mode="before")
+    @classmethod
+    def _migrate_claude_api_key(cls, data):
         """Support CLAUDE_API_KEY as a deprecated alias for ANTHROPIC_API_KEY."""
-        if self.claude_api_key:
-            if not self.anthropic_api_key:
-                self.anthropic_api_key = self.claude_api_key
-                warnings.warn(
-                    "CLAUDE_API_KEY is deprecated. "
-                    "Use ANTHROPIC_API_KEY instead.",
-                    DeprecationWarning,
-                    stacklevel=2,
-                )
-            else:
-                logger.debug(
-                    "Both ANTHROPIC_API_KEY and CLAUDE_API_KEY set; "
-                    "using ANTHROPIC_API_KEY."
-                )
-            self.claude_api_key = ""  # clear after migration
-        return self
+        if not isinstance(data, dict) or not data.get("claude_api_key"):
+            return data
+        data = dict(data)
+        if not data.get("anthropic_api_key"):
+            data["anthropic_api_key"] = data["claude_api_key"]
+            warnings.warn(
+                "CLAUDE_API_KEY is deprecated. "
+                "Use ANTHROPIC_API_KEY instead.",
+                DeprecationWarning,
+                stacklevel=2,
+            )
+        else:
+            logger.debug(
+                "Both ANTHROPIC_API_KEY and CLAUDE_API_KEY set; "
+                "using ANTHROPIC_API_KEY."
+            )
+        data["claude_api_key"] = ""  # clear after migration
+        return data
 
     # Database
     database_url: str = "sqlite:///data/btcedu.db"
@@ -47,6 +51,7 @@ class Settings(BaseSettings):
     source_type: str = "youtube_rss"  # "youtube_rss" or "rss"
     podcast_youtube_channel_id: str = ""
     podcast_rss_url: str = ""
+    feed_cache_dir: str = "data/feed_cache"  # ETag/Last-Modified + parsed episodes
 
     # Audio / Raw Data
     raw_data_dir: str = "data/raw"
@@ -78,7 +83,9 @@ class Settings(BaseSettings):
     reports_dir: str = "data/reports"
     logs_dir: str = "data/logs"
 
-    model_config = {"env_file": ".env", "env_file_encoding": "utf-8"}
+    # Frozen: one instance is shared process-wide via get_settings(); derive
+    # per-call variants with model_copy(update=...)
+    model_config = {"env_file": ".env", "env_file_encoding": "utf-8", "frozen": True}
 
     @property
     def rss_url(self) -> str:
@@ -96,5 +103,7 @@ class Settings(BaseSettings):
         return self.whisper_api_key or self.openai_api_key
 
 
+@functools.lru_cache(maxsize=1)
 def get_settings() -> Settings:
+    """Return the process-wide Settings, parsed from env/.env once."""
     return Settings()
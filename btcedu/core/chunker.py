@@ -1,19 +1,24 @@
-import json
 import logging
 from dataclasses import dataclass
 from pathlib import Path
 
+import orjson
+from sqlalchemy import delete
 from sqlalchemy import text as sql_text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
 from btcedu.models.episode import Chunk
 
 logger = logging.getLogger(__name__)
 
+# Sentence boundaries chunk_text prefers to break after
+_BREAK_CHARS = ".!?\n"
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class ChunkRecord:
-    """A single chunk with metadata."""
+    """A single chunk with metadata (immutable, no per-instance __dict__)."""
     chunk_id: str
     episode_id: str
     ordinal: int
@@ -71,13 +76,9 @@ def chunk_text(
         # Try to break at a sentence boundary (. ! ? newline) within last 20% of chunk
         if end < len(text):
             search_start = pos + int(chunk_size * 0.8)
-            best_break = None
-            for i in range(end, search_start, -1):
-                if i < len(text) and text[i - 1] in ".!?\n":
-                    best_break = i
-                    break
-            if best_break is not None:
-                end = best_break
+            best_break = max(text.rfind(ch, search_start, end) for ch in _BREAK_CHARS)
+            if best_break >= 0:
+                end = best_break + 1
 
         chunk_text_str = text[pos:end].strip()
         if chunk_text_str:
@@ -87,7 +88,7 @@ def chunk_text(
                 episode_id=episode_id,
                 ordinal=ordinal,
                 text=chunk_text_str,
-                token_estimate=estimate_tokens(chunk_text_str),
+                token_estimate=max(1, len(chunk_text_str) // 4),  # estimate_tokens, inlined
                 start_char=pos,
                 end_char=end,
             ))
@@ -111,7 +112,7 @@ def chunk_text(
                     episode_id=last.episode_id,
                     ordinal=last.ordinal,
                     text=extended,
-                    token_estimate=estimate_tokens(extended),
+                    token_estimate=max(1, len(extended) // 4),
                     start_char=last.start_char,
                     end_char=len(text),
                 )
@@ -130,9 +131,10 @@ def write_chunks_jsonl(chunks: list[ChunkRecord], output_dir: str) -> str:
     out.mkdir(parents=True, exist_ok=True)
     jsonl_path = out / "chunks.jsonl"
 
-    with open(jsonl_path, "w", encoding="utf-8") as f:
-        for chunk in chunks:
-            f.write(json.dumps(chunk.to_dict(), ensure_ascii=False) + "\n")
+    jsonl_path.write_bytes(b"".join(
+        orjson.dumps(chunk.to_dict(), option=orjson.OPT_APPEND_NEWLINE)
+        for chunk in chunks
+    ))
 
     logger.info("Wrote %d chunks to %s", len(chunks), jsonl_path)
     return str(jsonl_path)
@@ -145,41 +147,52 @@ def persist_chunks(
 ) -> int:
     """Persist chunks to SQLite chunks table + FTS5 index.
 
-    Deletes existing chunks for the episode first (idempotent).
+    Upserts by chunk_id and drops the episode's chunks that are no longer
+    present, so re-persisting is idempotent.
 
     Returns:
         Number of chunks persisted.
     """
-    # Delete existing chunks for this episode
-    session.query(Chunk).filter(Chunk.episode_id == episode_id).delete()
+    rows = [cr.to_dict() for cr in chunks]
+
+    # chunks_fts is an external-content index: remove the episode's entries
+    # while chunks still holds the text they were indexed from
     session.execute(
-        sql_text("DELETE FROM chunks_fts WHERE episode_id = :eid"),
+        sql_text(
+            "INSERT INTO chunks_fts (chunks_fts, rowid, chunk_id, episode_id, text) "
+            "SELECT 'delete', id, chunk_id, episode_id, text "
+            "FROM chunks WHERE episode_id = :eid"
+        ),
         {"eid": episode_id},
     )
 
-    # Insert new chunks
-    for cr in chunks:
-        chunk = Chunk(
-            chunk_id=cr.chunk_id,
-            episode_id=cr.episode_id,
-            ordinal=cr.ordinal,
-            text=cr.text,
-            token_estimate=cr.token_estimate,
-            start_char=cr.start_char,
-            end_char=cr.end_char,
+    # Drop chunks of this episode that are not in the new set
+    session.execute(
+        delete(Chunk).where(
+            Chunk.episode_id == episode_id,
+            Chunk.chunk_id.not_in([r["chunk_id"] for r in rows]),
         )
-        session.add(chunk)
-
-    session.flush()
+    )
 
-    # Populate FTS index
-    for cr in chunks:
+    if rows:
+        stmt = sqlite_insert(Chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Chunk.chunk_id],
+            set_={
+                col: stmt.excluded[col]
+                for col in ("episode_id", "ordinal", "text", "token_estimate",
+                            "start_char", "end_char")
+            },
+        )
+        session.execute(stmt, rows)
+        # Index the stored rows in one set-based statement (text is not re-sent)
         session.execute(
             sql_text(
-                "INSERT INTO chunks_fts (chunk_id, episode_id, text) "
-                "VALUES (:cid, :eid, :txt)"
+                "INSERT INTO chunks_fts (rowid, chunk_id, episode_id, text) "
+                "SELECT id, chunk_id, episode_id, text "
+                "FROM chunks WHERE episode_id = :eid"
             ),
-            {"cid": cr.chunk_id, "eid": cr.episode_id, "txt": cr.text},
+            {"eid": episode_id},
         )
 
     session.commit()
@@ -187,28 +200,36 @@ def persist_chunks(
     return len(chunks)
 
 
-def search_chunks_fts(session: Session, query: str, episode_id: str | None = None) -> list[dict]:
-    """Search chunks using FTS5.
+# One constant statement for every search: SQLAlchemy caches its compiled
+# form and sqlite3's statement cache reuses the prepared statement.
+# LIMIT -1 means no limit in SQLite.
+_FTS_SEARCH = sql_text(
+    "SELECT chunk_id, episode_id, snippet(chunks_fts, 2, '>>>', '<<<', '...', 32) "
+    "FROM chunks_fts WHERE chunks_fts MATCH :q "
+    "AND (:eid IS NULL OR episode_id = :eid) "
+    "ORDER BY rank LIMIT :limit"
+)
+
+
+def search_chunks_fts(
+    session: Session,
+    query: str,
+    episode_id: str | None = None,
+    limit: int | None = None,
+) -> list[dict]:
+    """Search chunks using FTS5, best matches (bm25 rank) first.
+
+    The query runs against chunks_fts alone; the episode filter and limit
+    are applied inside the same statement so no rows are over-fetched.
 
     Returns:
         List of dicts with chunk_id, episode_id, snippet.
     """
-    if episode_id:
-        rows = session.execute(
-            sql_text(
-                "SELECT chunk_id, episode_id, snippet(chunks_fts, 2, '>>>', '<<<', '...', 32) "
-                "FROM chunks_fts WHERE episode_id = :eid AND chunks_fts MATCH :q"
-            ),
-            {"eid": episode_id, "q": query},
-        ).fetchall()
-    else:
-        rows = session.execute(
-            sql_text(
-                "SELECT chunk_id, episode_id, snippet(chunks_fts, 2, '>>>', '<<<', '...', 32) "
-                "FROM chunks_fts WHERE chunks_fts MATCH :q"
-            ),
-            {"q": query},
-        ).fetchall()
+    rows = session.execute(_FTS_SEARCH, {
+        "q": query,
+        "eid": episode_id or None,
+        "limit": -1 if limit is None else limit,
+    }).fetchall()
 
     return [
         {"chunk_id": r[0], "episode_id": r[1], "snippet": r[2]}
@@ -3,6 +3,8 @@ from dataclasses import dataclass
 from datetime import date, datetime, timezone
 from pathlib import Path
 
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
 from btcedu.config import Settings
@@ -10,12 +12,19 @@ from btcedu.models.episode import Episode, EpisodeStatus
 from btcedu.models.schemas import EpisodeInfo
 from btcedu.services.feed_service import (
     fetch_channel_videos_ytdlp,
-    fetch_feed,
+    legacy_fallback_id,
+    load_feed_episodes,
     parse_feed,
 )
 
 logger = logging.getLogger(__name__)
 
+# SQLite builds before 3.32 cap a statement at 999 bound variables. A
+# multi-row VALUES insert binds one per column per row (Python-side column
+# defaults included), so batches are sized by the table's full column count.
+_SQLITE_MAX_VARIABLES = 999
+_INSERT_BATCH = _SQLITE_MAX_VARIABLES // len(Episode.__table__.columns)
+
 
 @dataclass
 class DetectResult:
@@ -25,6 +34,49 @@ class DetectResult:
     total: int = 0
 
 
+def _insert_new_episodes(session: Session, episodes: list[EpisodeInfo]) -> int:
+    """Insert episodes not yet stored, in one INSERT ... ON CONFLICT DO NOTHING.
+
+    Generic RSS episodes detected before the BLAKE2s switch were stored
+    under a sha1-based fallback ID; those are filtered out first so they
+    are not inserted a second time under the new ID.
+
+    Returns:
+        Number of episodes inserted.
+    """
+    legacy = {legacy_fallback_id(ep.url): ep for ep in episodes if ep.source == "rss"}
+    if legacy:
+        legacy_ids = list(legacy)
+        skip = set()
+        for i in range(0, len(legacy_ids), _SQLITE_MAX_VARIABLES):
+            known_legacy = session.scalars(
+                select(Episode.episode_id).where(
+                    Episode.episode_id.in_(legacy_ids[i:i + _SQLITE_MAX_VARIABLES])
+                )
+            )
+            skip.update(legacy[lid].episode_id for lid in known_legacy)
+        episodes = [ep for ep in episodes if ep.episode_id not in skip]
+
+    rows = [
+        {
+            "episode_id": ep.episode_id,
+            "source": ep.source,
+            "title": ep.title,
+            "url": ep.url,
+            "published_at": ep.published_at,
+            "status": EpisodeStatus.NEW,
+        }
+        for ep in episodes
+    ]
+    inserted = 0
+    # Multi-row VALUES, batched to stay under SQLite's bind-variable limit
+    for i in range(0, len(rows), _INSERT_BATCH):
+        stmt = sqlite_insert(Episode).values(rows[i:i + _INSERT_BATCH])
+        stmt = stmt.on_conflict_do_nothing(index_elements=[Episode.episode_id])
+        inserted += session.execute(stmt).rowcount
+    return inserted
+
+
 def detect_episodes(session: Session, settings: Settings) -> DetectResult:
     """Fetch feed, parse episodes, insert new ones into DB.
 
@@ -37,30 +89,12 @@ def detect_episodes(session: Session, settings: Settings) -> DetectResult:
     if not feed_url:
         raise ValueError("No feed URL configured. Set PODCAST_YOUTUBE_CHANNEL_ID or PODCAST_RSS_URL.")
 
-    feed_content = fetch_feed(feed_url)
-    episodes = parse_feed(feed_content, settings.source_type)
+    episodes = load_feed_episodes(
+        feed_url, settings.source_type, cache_dir=settings.feed_cache_dir,
+    )
 
     result = DetectResult(found=len(episodes))
-
-    existing_ids = {
-        row[0]
-        for row in session.query(Episode.episode_id).all()
-    }
-
-    for ep_info in episodes:
-        if ep_info.episode_id in existing_ids:
-            continue
-        episode = Episode(
-            episode_id=ep_info.episode_id,
-            source=ep_info.source,
-            title=ep_info.title,
-            url=ep_info.url,
-            published_at=ep_info.published_at,
-            status=EpisodeStatus.NEW,
-        )
-        session.add(episode)
-        result.new += 1
-
+    result.new = _insert_new_episodes(session, episodes)
     session.commit()
     result.total = session.query(Episode).count()
     return result
@@ -75,26 +109,7 @@ def detect_from_content(
     """
     episodes = parse_feed(feed_content, source_type)
     result = DetectResult(found=len(episodes))
-
-    existing_ids = {
-        row[0]
-        for row in session.query(Episode.episode_id).all()
-    }
-
-    for ep_info in episodes:
-        if ep_info.episode_id in existing_ids:
-            continue
-        episode = Episode(
-            episode_id=ep_info.episode_id,
-            source=ep_info.source,
-            title=ep_info.title,
-            url=ep_info.url,
-            published_at=ep_info.published_at,
-            status=EpisodeStatus.NEW,
-        )
-        session.add(episode)
-        result.new += 1
-
+    result.new = _insert_new_episodes(session, episodes)
     session.commit()
     result.total = session.query(Episode).count()
     return result
@@ -205,11 +220,9 @@ def download_episode(
     """
     from btcedu.services.download_service import download_audio
 
-    episode = (
-        session.query(Episode)
-        .filter(Episode.episode_id == episode_id)
-        .first()
-    )
+    episode = session.scalars(
+        select(Episode).where(Episode.episode_id == episode_id)
+    ).one_or_none()
     if not episode:
         raise ValueError(f"Episode not found: {episode_id}")
 
@@ -1,11 +1,14 @@
 """Content generation orchestrator: retrieval + Claude calls + file output."""
 
-import json
 import logging
+import re
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
 
+import orjson
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from btcedu.config import Settings
@@ -39,6 +42,10 @@ DE_STOPWORDS = frozenset(
     "weil wenn wer wir wird wohl zu".split()
 )
 
+# Runs of 3+ letters/digits; punctuation, hyphens and slashes all act as
+# separators (e.g. "Saylor-Kalkül:" → "Saylor", "Kalkül")
+_TERM_RE = re.compile(r"[^\W_]{3,}")
+
 ARTIFACT_TYPES = ("outline", "script", "shorts", "visuals", "qa", "publishing")
 
 REFINE_ARTIFACT_TYPES = ("refine_outline", "refine_script", "refine_publishing")
@@ -80,19 +87,11 @@ def build_query_terms(title: str) -> list[str]:
         Each term is double-quoted to prevent FTS5 from interpreting
         hyphens, brackets, or other characters as operators.
     """
-    import re
-
-    words = []
-    for word in title.split():
-        # Strip punctuation and brackets
-        clean = word.strip(".,;:!?\"'()-/[]")
-        # Split on internal hyphens (e.g. "Saylor-Kalkül" → ["Saylor", "Kalkül"])
-        parts = re.split(r"[-/]", clean) if clean else []
-        for part in parts:
-            part = part.strip()
-            if part and part.lower() not in DE_STOPWORDS and len(part) > 2:
-                # Double-quote for FTS5 literal matching (safe from operator parsing)
-                words.append(f'"{part}"')
+    # Double-quote for FTS5 literal matching (safe from operator parsing)
+    words = [
+        f'"{part}"' for part in _TERM_RE.findall(title)
+        if part.lower() not in DE_STOPWORDS
+    ]
     return words if words else [f'"{title.split()[0]}"'] if title.strip() else ['"Bitcoin"']
 
 
@@ -111,7 +110,9 @@ def retrieve_chunks(
     """
     # Build FTS5 OR query
     fts_query = " OR ".join(query_terms)
-    fts_results = search_chunks_fts(session, fts_query, episode_id=episode_id)
+    fts_results = search_chunks_fts(
+        session, fts_query, episode_id=episode_id, limit=top_k,
+    )
 
     # Get unique chunk_ids preserving FTS rank order
     seen = set()
@@ -125,6 +126,7 @@ def retrieve_chunks(
             break
 
     # If too few FTS results, fall back to ordinal-based selection
+    chunk_map: dict[str, Chunk] = {}
     if len(ranked_ids) < top_k // 2:
         all_chunks = (
             session.query(Chunk)
@@ -133,6 +135,7 @@ def retrieve_chunks(
             .limit(top_k)
             .all()
         )
+        chunk_map = {c.chunk_id: c for c in all_chunks}
         for c in all_chunks:
             if c.chunk_id not in seen:
                 seen.add(c.chunk_id)
@@ -140,13 +143,13 @@ def retrieve_chunks(
             if len(ranked_ids) >= top_k:
                 break
 
-    # Fetch full text from Chunk ORM
-    chunks_orm = (
-        session.query(Chunk)
-        .filter(Chunk.chunk_id.in_(ranked_ids))
-        .all()
-    )
-    chunk_map = {c.chunk_id: c for c in chunks_orm}
+    # Fetch full text from Chunk ORM (only rows the fallback didn't load)
+    missing = [cid for cid in ranked_ids if cid not in chunk_map]
+    if missing:
+        chunk_map.update(
+            (c.chunk_id, c)
+            for c in session.query(Chunk).filter(Chunk.chunk_id.in_(missing))
+        )
 
     # Build result list preserving rank order
     result = []
@@ -169,13 +172,9 @@ def format_chunks_for_prompt(chunks: list[dict], episode_id: str) -> str:
 
     Each chunk is labeled with its citation ID for the model to reference.
     """
-    lines = []
-    for c in chunks:
-        cid = f"[{episode_id}_C{c['ordinal']:04d}]"
-        lines.append(f"--- {cid} ---")
-        lines.append(c["text"])
-        lines.append("")
-    return "\n".join(lines)
+    return "\n".join(
+        f"--- [{episode_id}_C{c['ordinal']:04d}] ---\n{c['text']}\n" for c in chunks
+    )
 
 
 def save_retrieval_snapshot(
@@ -211,7 +210,7 @@ def save_retrieval_snapshot(
         ],
     }
 
-    path.write_text(json.dumps(snapshot, ensure_ascii=False, indent=2), encoding="utf-8")
+    path.write_bytes(orjson.dumps(snapshot, option=orjson.OPT_INDENT_2))
     return str(path)
 
 
@@ -224,7 +223,8 @@ def generate_content(
 ) -> GenerationResult:
     """Generate all Turkish content artifacts for a CHUNKED episode.
 
-    Sequentially generates: outline -> script -> shorts -> visuals -> qa -> publishing.
+    Generates: outline -> {script, shorts, visuals} -> {qa, publishing},
+    with the artifacts inside each group requested concurrently.
 
     Returns:
         GenerationResult with paths and usage stats.
@@ -232,11 +232,9 @@ def generate_content(
     Raises:
         ValueError: If episode not found or not in CHUNKED/GENERATED state.
     """
-    episode = (
-        session.query(Episode)
-        .filter(Episode.episode_id == episode_id)
-        .first()
-    )
+    episode = session.scalars(
+        select(Episode).where(Episode.episode_id == episode_id)
+    ).one_or_none()
     if not episode:
         raise ValueError(f"Episode not found: {episode_id}")
 
@@ -270,48 +268,40 @@ def generate_content(
 
         chunks_text = format_chunks_for_prompt(chunks, episode_id)
 
-        # Generate artifacts sequentially
-        outline_resp = _generate_artifact(
-            "outline", episode, chunks, chunks_text, query_terms,
-            settings, output_dir, top_k, session, force,
-        )
-        _accumulate(result, outline_resp)
-
-        script_resp = _generate_artifact(
-            "script", episode, chunks, chunks_text, query_terms,
-            settings, output_dir, top_k, session, force,
-            outline_text=outline_resp["text"],
-        )
-        _accumulate(result, script_resp)
-
-        shorts_resp = _generate_artifact(
-            "shorts", episode, chunks, chunks_text, query_terms,
-            settings, output_dir, top_k, session, force,
-            outline_text=outline_resp["text"],
-        )
-        _accumulate(result, shorts_resp)
-
-        visuals_resp = _generate_artifact(
-            "visuals", episode, chunks, chunks_text, query_terms,
-            settings, output_dir, top_k, session, force,
-            outline_text=outline_resp["text"],
-        )
-        _accumulate(result, visuals_resp)
-
-        qa_resp = _generate_artifact(
-            "qa", episode, chunks, chunks_text, query_terms,
-            settings, output_dir, top_k, session, force,
-            script_text=script_resp["text"],
-        )
-        _accumulate(result, qa_resp)
-
-        pub_resp = _generate_artifact(
-            "publishing", episode, chunks, chunks_text, query_terms,
-            settings, output_dir, top_k, session, force,
-            outline_text=outline_resp["text"],
-            script_text=script_resp["text"],
-        )
-        _accumulate(result, pub_resp)
+        # Generate artifacts in dependency order. Claude calls that only need
+        # the outline (script/shorts/visuals), and then those that need the
+        # script (qa/publishing), run concurrently; DB writes stay on this
+        # thread and artifacts are recorded in a fixed order. Workers get plain
+        # strings, never the ORM episode.
+        title = episode.title
+
+        def generate(artifact_type: str, **texts: str) -> dict:
+            return _generate_artifact(
+                artifact_type, title, episode_id, chunks, chunks_text, query_terms,
+                settings, output_dir, top_k, force, **texts,
+            )
+
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            outline_resp = generate("outline")
+            _accumulate(result, outline_resp, session)
+            outline_text = outline_resp["text"]
+
+            script_f = pool.submit(generate, "script", outline_text=outline_text)
+            shorts_f = pool.submit(generate, "shorts", outline_text=outline_text)
+            visuals_f = pool.submit(generate, "visuals", outline_text=outline_text)
+            first = (script_f, shorts_f, visuals_f)
+            wait(first)
+            if any(f.exception() is not None for f in first):
+                # Records whatever succeeded, then re-raises; qa/publishing
+                # are never submitted
+                _record_in_order(result, first, session)
+            script_text = script_f.result()["text"]
+
+            qa_f = pool.submit(generate, "qa", script_text=script_text)
+            pub_f = pool.submit(
+                generate, "publishing", outline_text=outline_text, script_text=script_text,
+            )
+            _record_in_order(result, (script_f, shorts_f, visuals_f, qa_f, pub_f), session)
 
         # Update PipelineRun
         pipeline_run.status = RunStatus.SUCCESS
@@ -360,11 +350,9 @@ def refine_content(
     Raises:
         ValueError: If episode not found or not in GENERATED/REFINED state.
     """
-    episode = (
-        session.query(Episode)
-        .filter(Episode.episode_id == episode_id)
-        .first()
-    )
+    episode = session.scalars(
+        select(Episode).where(Episode.episode_id == episode_id)
+    ).one_or_none()
     if not episode:
         raise ValueError(f"Episode not found: {episode_id}")
 
@@ -381,11 +369,11 @@ def refine_content(
     script_v1_path = output_dir / ARTIFACT_FILENAMES["script"]
     qa_path = output_dir / ARTIFACT_FILENAMES["qa"]
 
-    for path, label in [
+    for path, label in (
         (outline_v1_path, "outline v1"),
         (script_v1_path, "script v1"),
         (qa_path, "qa.json"),
-    ]:
+    ):
         if not path.exists():
             raise ValueError(f"Missing required input: {label} ({path})")
 
@@ -412,31 +400,31 @@ def refine_content(
 
         # Step 1: Refine outline using v1 outline + QA
         outline_v2_resp = _generate_artifact(
-            "refine_outline", episode, empty_chunks, "", empty_query_terms,
-            settings, output_dir, 0, session, force,
+            "refine_outline", episode.title, episode_id, empty_chunks, "", empty_query_terms,
+            settings, output_dir, 0, force,
             outline_text=outline_v1,
             qa_text=qa_text,
         )
-        _accumulate(result, outline_v2_resp)
+        _accumulate(result, outline_v2_resp, session)
 
         # Step 2: Refine script using v1 script + v2 outline + QA
         script_v2_resp = _generate_artifact(
-            "refine_script", episode, empty_chunks, "", empty_query_terms,
-            settings, output_dir, 0, session, force,
+            "refine_script", episode.title, episode_id, empty_chunks, "", empty_query_terms,
+            settings, output_dir, 0, force,
             script_text=script_v1,
             outline_text=outline_v2_resp["text"],
             qa_text=qa_text,
         )
-        _accumulate(result, script_v2_resp)
+        _accumulate(result, script_v2_resp, session)
 
         # Step 3: Regenerate publishing pack from v2 outline + v2 script
         pub_v2_resp = _generate_artifact(
-            "refine_publishing", episode, empty_chunks, "", empty_query_terms,
-            settings, output_dir, 0, session, force,
+            "refine_publishing", episode.title, episode_id, empty_chunks, "", empty_query_terms,
+            settings, output_dir, 0, force,
             outline_text=outline_v2_resp["text"],
             script_text=script_v2_resp["text"],
         )
-        _accumulate(result, pub_v2_resp)
+        _accumulate(result, pub_v2_resp, session)
 
         # Update PipelineRun
         pipeline_run.status = RunStatus.SUCCESS
@@ -465,30 +453,63 @@ def refine_content(
     return result
 
 
-def _accumulate(result: GenerationResult, artifact_resp: dict) -> None:
-    """Accumulate artifact response into GenerationResult."""
+def _accumulate(result: GenerationResult, artifact_resp: dict, session: Session) -> None:
+    """Accumulate artifact response into GenerationResult and stage its DB row."""
+    if artifact_resp["artifact"] is not None:
+        session.add(artifact_resp["artifact"])
+        session.flush()
     result.artifacts.append(artifact_resp["path"])
     result.total_input_tokens += artifact_resp["input_tokens"]
     result.total_output_tokens += artifact_resp["output_tokens"]
     result.total_cost_usd += artifact_resp["cost"]
 
 
+def _record_in_order(
+    result: GenerationResult, futures: tuple[Future, ...], session: Session,
+) -> None:
+    """Accumulate artifact futures in order; re-raise the first failure at the end.
+
+    On a failure, futures that haven't started are cancelled, but ones already
+    running are still awaited and recorded: they write their output file, and
+    a rerun skips existing files, so a missing row would never be filled in.
+    """
+    error = None
+    for future in futures:
+        if future.cancelled():
+            continue
+        try:
+            resp = future.result()
+        except Exception as e:
+            if error is None:
+                error = e
+                for pending in futures:
+                    pending.cancel()
+            continue
+        _accumulate(result, resp, session)
+    if error is not None:
+        raise error
+
+
 def _generate_artifact(
     artifact_type: str,
-    episode: Episode,
+    episode_title: str,
+    episode_id: str,
     chunks: list[dict],
     chunks_text: str,
     query_terms: list[str],
     settings: Settings,
     output_dir: Path,
     top_k: int,
-    session: Session,
     force: bool,
     outline_text: str = "",
     script_text: str = "",
     qa_text: str = "",
 ) -> dict:
-    """Generate a single artifact. Returns dict with text, path, tokens, cost."""
+    """Generate a single artifact. Returns dict with text, path, tokens, cost.
+
+    Does not touch the DB session (it may run on a worker thread); the
+    unsaved ContentArtifact is returned under "artifact" for the caller.
+    """
     filename = ARTIFACT_FILENAMES[artifact_type]
     output_path = output_dir / filename
 
@@ -502,13 +523,14 @@ def _generate_artifact(
             "input_tokens": 0,
             "output_tokens": 0,
             "cost": 0.0,
+            "artifact": None,
         }
 
     # Build prompt
     from btcedu.prompts.system import SYSTEM_PROMPT
 
     user_prompt = _build_prompt(
-        artifact_type, episode.title, episode.episode_id,
+        artifact_type, episode_title, episode_id,
         chunks_text, outline_text, script_text, qa_text,
     )
 
@@ -542,15 +564,13 @@ def _generate_artifact(
 
     # Persist ContentArtifact
     artifact = ContentArtifact(
-        episode_id=episode.episode_id,
+        episode_id=episode_id,
         artifact_type=artifact_type,
         file_path=str(output_path),
         model=response.model,
         prompt_hash=prompt_hash,
         retrieval_snapshot_path=snapshot_path,
     )
-    session.add(artifact)
-    session.flush()
 
     return {
         "text": response.text,
@@ -558,6 +578,7 @@ def _generate_artifact(
         "input_tokens": response.input_tokens,
         "output_tokens": response.output_tokens,
         "cost": response.cost_usd,
+        "artifact": artifact,
     }
 
 
@@ -1,6 +1,5 @@
 """Pipeline orchestration: end-to-end episode processing with retry and reporting."""
 
-import json
 import logging
 import time
 from dataclasses import dataclass, field
@@ -9,6 +8,8 @@ from pathlib import Path
 
 from typing import Callable
 
+import orjson
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from btcedu.config import Settings
@@ -392,11 +393,9 @@ def retry_episode(
     Raises:
         ValueError: If episode not found or not in a failed state.
     """
-    episode = (
-        session.query(Episode)
-        .filter(Episode.episode_id == episode_id)
-        .first()
-    )
+    episode = session.scalars(
+        select(Episode).where(Episode.episode_id == episode_id)
+    ).one_or_none()
     if not episode:
         raise ValueError(f"Episode not found: {episode_id}")
 
@@ -420,19 +419,9 @@ def retry_episode(
                                 stage_callback=stage_callback)
 
 
-def write_report(report: PipelineReport, reports_dir: str) -> str:
-    """Write a PipelineReport as JSON to reports_dir/{episode_id}/.
-
-    Returns:
-        Path to the written report file.
-    """
-    report_dir = Path(reports_dir) / report.episode_id
-    report_dir.mkdir(parents=True, exist_ok=True)
-
-    timestamp = report.started_at.strftime("%Y%m%d_%H%M%S")
-    path = report_dir / f"report_{timestamp}.json"
-
-    data = {
+def _report_to_dict(report: PipelineReport) -> dict:
+    """JSON-serializable form of a PipelineReport, as written by write_report."""
+    return {
         "episode_id": report.episode_id,
         "title": report.title,
         "started_at": report.started_at.isoformat(),
@@ -452,7 +441,22 @@ def write_report(report: PipelineReport, reports_dir: str) -> str:
         ],
     }
 
-    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+
+def write_report(report: PipelineReport, reports_dir: str) -> str:
+    """Write a PipelineReport as JSON to reports_dir/{episode_id}/.
+
+    Returns:
+        Path to the written report file.
+    """
+    report_dir = Path(reports_dir) / report.episode_id
+    report_dir.mkdir(parents=True, exist_ok=True)
+
+    timestamp = report.started_at.strftime("%Y%m%d_%H%M%S")
+    path = report_dir / f"report_{timestamp}.json"
+
+    data = _report_to_dict(report)
+
+    path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
     logger.info("Report written: %s", path)
 
     return str(path)
@@ -2,6 +2,7 @@
 import logging
 from pathlib import Path
 
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from btcedu.config import Settings
@@ -29,11 +30,9 @@ def transcribe_episode(
     """
     from btcedu.services.transcription_service import clean_transcript, transcribe_audio
 
-    episode = (
-        session.query(Episode)
-        .filter(Episode.episode_id == episode_id)
-        .first()
-    )
+    episode = session.scalars(
+        select(Episode).where(Episode.episode_id == episode_id)
+    ).one_or_none()
     if not episode:
         raise ValueError(f"Episode not found: {episode_id}")
 
@@ -70,6 +69,7 @@ def transcribe_episode(
         model=settings.whisper_model,
         language=settings.whisper_language,
         max_chunk_mb=settings.max_audio_chunk_mb,
+        max_retries=settings.max_retries,
     )
 
     # Save raw transcript
@@ -104,11 +104,9 @@ def chunk_episode(
     Raises:
         ValueError: If episode not found or not in TRANSCRIBED state.
     """
-    episode = (
-        session.query(Episode)
-        .filter(Episode.episode_id == episode_id)
-        .first()
-    )
+    episode = session.scalars(
+        select(Episode).where(Episode.episode_id == episode_id)
+    ).one_or_none()
     if not episode:
         raise ValueError(f"Episode not found: {episode_id}")
 
@@ -127,7 +125,7 @@ def chunk_episode(
         if episode.status == EpisodeStatus.TRANSCRIBED:
             episode.status = EpisodeStatus.CHUNKED
             session.commit()
-        return session.query(Chunk).filter_by(episode_id=episode_id).count()
+        return _episode_chunk_count(session, episode_id)
 
     if not episode.transcript_path:
         raise ValueError(f"No transcript for episode {episode_id}")
@@ -145,11 +143,24 @@ def chunk_episode(
     # Write JSONL
     write_chunks_jsonl(chunks, str(chunks_dir))
 
-    # Persist to DB + FTS
-    count = persist_chunks(session, chunks, episode_id)
-
-    # Update episode status
-    episode.status = EpisodeStatus.CHUNKED
-    session.commit()
+    # Persist to DB + FTS; the status change is committed by persist_chunks
+    # together with the chunks, and no_autoflush keeps it from being flushed
+    # ahead of the chunk statements
+    try:
+        with session.no_autoflush:
+            episode.status = EpisodeStatus.CHUNKED
+            count = persist_chunks(session, chunks, episode_id)
+    except Exception:
+        # Don't leave CHUNKED pending for the caller's next commit (the CLI
+        # reuses one session across episodes)
+        session.rollback()
+        raise
 
     return count
+
+
+def _episode_chunk_count(session: Session, episode_id: str) -> int:
+    """COUNT(*) straight off the (episode_id, ordinal) index, no subquery."""
+    return session.scalar(
+        select(func.count()).select_from(Chunk).where(Chunk.episode_id == episode_id)
+    )
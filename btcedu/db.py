@@ -10,7 +10,23 @@ class Base(DeclarativeBase):
 
 def get_engine(database_url: str | None = None):
     url = database_url or get_settings().database_url
-    return create_engine(url, echo=False)
+    engine = create_engine(url, echo=False)
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+    return engine
+
+
+def _set_sqlite_pragmas(dbapi_conn, _record) -> None:
+    """WAL + synchronous=NORMAL: commits append to the WAL without a full fsync.
+
+    The page cache is raised to 64 MiB (negative cache_size is in KiB).
+    """
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute("PRAGMA temp_store=MEMORY")
+    cur.execute("PRAGMA cache_size=-65536")
+    cur.close()
 
 
 def get_session_factory(database_url: str | None = None) -> sessionmaker[Session]:
@@ -22,14 +38,40 @@ def init_db(database_url: str | None = None) -> None:
     """Create all tables including FTS5 virtual table."""
     engine = get_engine(database_url)
     Base.metadata.create_all(engine)
+    _init_indexes(engine)
     _init_fts(engine)
 
 
+def _init_indexes(engine) -> None:
+    """Add indexes declared after a table was first created."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
+
+# External-content FTS5 index over chunks: only the inverted index is stored,
+# column values (for snippet()) are read back from chunks by rowid = chunks.id
+CHUNKS_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts "
+    "USING fts5(chunk_id UNINDEXED, episode_id UNINDEXED, text, "
+    "content='chunks', content_rowid='id')"
+)
+
+
 def _init_fts(engine) -> None:
-    """Create FTS5 virtual table for chunk full-text search."""
+    """Create FTS5 virtual table for chunk full-text search.
+
+    An older chunks_fts that stored its own copy of the text is dropped and
+    rebuilt from the chunks table.
+    """
     with engine.connect() as conn:
-        conn.execute(text(
-            "CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts "
-            "USING fts5(chunk_id UNINDEXED, episode_id UNINDEXED, text)"
-        ))
+        existing = conn.execute(text(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'chunks_fts'"
+        )).scalar()
+        if existing and "content=" not in existing:
+            conn.execute(text("DROP TABLE chunks_fts"))
+            existing = None
+        conn.execute(text(CHUNKS_FTS_DDL))
+        if existing is None:
+            conn.execute(text("INSERT INTO chunks_fts (chunks_fts) VALUES ('rebuild')"))
         conn.commit()
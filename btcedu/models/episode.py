@@ -1,7 +1,7 @@
 import enum
 from datetime import datetime, timezone
 
-from sqlalchemy import DateTime, Enum, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import DateTime, Enum, Float, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from btcedu.db import Base
@@ -40,6 +40,8 @@ def _utcnow() -> datetime:
 
 class Episode(Base):
     __tablename__ = "episodes"
+    # run_pending / run_latest filter on status and order by published_at
+    __table_args__ = (Index("ix_episode_status_published", "status", "published_at"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     episode_id: Mapped[str] = mapped_column(String(64), unique=True, nullable=False)
@@ -109,10 +111,12 @@ class PipelineRun(Base):
 
 class Chunk(Base):
     __tablename__ = "chunks"
+    # Covers per-episode lookups and ordinal-ordered scans (retrieval fallback)
+    __table_args__ = (Index("ix_chunk_episode_ord", "episode_id", "ordinal"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     chunk_id: Mapped[str] = mapped_column(String(64), unique=True, nullable=False)
-    episode_id: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
+    episode_id: Mapped[str] = mapped_column(String(64), nullable=False)
     ordinal: Mapped[int] = mapped_column(Integer, nullable=False)
     text: Mapped[str] = mapped_column(Text, nullable=False)
     token_estimate: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -1,12 +1,14 @@
 """Claude API service wrapper with dry-run support."""
 
+import functools
 import hashlib
-import json
 import logging
-from dataclasses import asdict, dataclass
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
 
+import orjson
+
 logger = logging.getLogger(__name__)
 
 # Claude Sonnet 4 pricing (per million tokens)
@@ -43,6 +45,22 @@ def compute_prompt_hash(
     return hashlib.sha256(payload.encode()).hexdigest()
 
 
+@functools.lru_cache(maxsize=4)
+def _get_client(api_key: str, max_retries: int):
+    """Return a shared Anthropic client per API key (imported on first use).
+
+    Reusing one client keeps its connection pool warm across the artifact
+    calls of a generation run instead of reconnecting for each one.
+    """
+    from anthropic import Anthropic, Timeout
+
+    return Anthropic(
+        api_key=api_key,
+        max_retries=max_retries,
+        timeout=Timeout(600.0, connect=5.0),
+    )
+
+
 def call_claude(
     system_prompt: str,
     user_message: str,
@@ -63,12 +81,7 @@ def call_claude(
     if settings.dry_run:
         return _write_dry_run(system_prompt, user_message, settings, dry_run_path)
 
-    from anthropic import Anthropic
-
-    client = Anthropic(
-        api_key=settings.anthropic_api_key,
-        max_retries=settings.max_retries,
-    )
+    client = _get_client(settings.anthropic_api_key, settings.max_retries)
 
     response = client.messages.create(
         model=settings.claude_model,
@@ -120,9 +133,7 @@ def _write_dry_run(
 
     if output_path:
         output_path.parent.mkdir(parents=True, exist_ok=True)
-        output_path.write_text(
-            json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8"
-        )
+        output_path.write_bytes(orjson.dumps(payload, option=orjson.OPT_INDENT_2))
         logger.info("Dry-run payload written: %s", output_path)
 
     return ClaudeResponse(
@@ -1,11 +1,14 @@
+import functools
 import logging
 import math
+import re
+import shutil
 from pathlib import Path
 
-from openai import OpenAI
-
 logger = logging.getLogger(__name__)
 
+_MULTI_BLANK = re.compile(r"\n{3,}")
+
 
 def transcribe_audio(
     audio_path: str,
@@ -13,10 +16,13 @@ def transcribe_audio(
     model: str = "whisper-1",
     language: str = "de",
     max_chunk_mb: int = 24,
+    max_retries: int = 3,
 ) -> str:
     """Transcribe an audio file using OpenAI Whisper API.
 
     If the file exceeds max_chunk_mb, it is split into segments first.
+    Transient API failures are retried per request (and so per segment),
+    so one bad response does not redo already-transcribed segments.
 
     Returns:
         Full transcript text.
@@ -24,10 +30,29 @@ def transcribe_audio(
     file_size_mb = Path(audio_path).stat().st_size / (1024 * 1024)
 
     if file_size_mb <= max_chunk_mb:
-        return _transcribe_single(audio_path, api_key, model, language)
+        return _transcribe_single(audio_path, api_key, model, language, max_retries)
 
     logger.info("Audio %.1f MB > %d MB limit, splitting...", file_size_mb, max_chunk_mb)
-    return _transcribe_chunked(audio_path, api_key, model, language, max_chunk_mb)
+    return _transcribe_chunked(
+        audio_path, api_key, model, language, max_chunk_mb, file_size_mb,
+        max_retries,
+    )
+
+
+@functools.lru_cache(maxsize=4)
+def _get_client(api_key: str, max_retries: int):
+    """Return a shared OpenAI client per API key (imported on first use).
+
+    The SDK retries connection errors, 429s and 5xx with exponential
+    backoff; uploads get a long read timeout but fail fast on connect.
+    """
+    from openai import OpenAI, Timeout
+
+    return OpenAI(
+        api_key=api_key,
+        max_retries=max_retries,
+        timeout=Timeout(600.0, connect=5.0),
+    )
 
 
 def _transcribe_single(
@@ -35,9 +60,10 @@ def _transcribe_single(
     api_key: str,
     model: str,
     language: str,
+    max_retries: int = 3,
 ) -> str:
     """Transcribe a single audio file."""
-    client = OpenAI(api_key=api_key)
+    client = _get_client(api_key, max_retries)
     with open(audio_path, "rb") as f:
         response = client.audio.transcriptions.create(
             model=model,
@@ -54,13 +80,14 @@ def _transcribe_chunked(
     model: str,
     language: str,
     max_chunk_mb: int,
+    file_size_mb: float,
+    max_retries: int = 3,
 ) -> str:
     """Split audio and transcribe each segment, then concatenate."""
     from pydub import AudioSegment
 
     audio = AudioSegment.from_file(audio_path)
     duration_ms = len(audio)
-    file_size_mb = Path(audio_path).stat().st_size / (1024 * 1024)
 
     # Calculate segment duration to stay under the size limit
     num_segments = math.ceil(file_size_mb / max_chunk_mb)
@@ -83,22 +110,19 @@ def _transcribe_chunked(
             tmp_path = tmp_dir / f"segment_{i:03d}.mp3"
             segment.export(str(tmp_path), format="mp3")
             logger.info("Transcribing segment %d/%d...", i + 1, len(segments))
-            text = _transcribe_single(str(tmp_path), api_key, model, language)
+            text = _transcribe_single(
+                str(tmp_path), api_key, model, language, max_retries,
+            )
             parts.append(text)
     finally:
         # Clean up temp files
-        for f in tmp_dir.glob("*"):
-            f.unlink()
-        tmp_dir.rmdir()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
 
     return "\n\n".join(parts)
 
 
 def clean_transcript(raw_text: str) -> str:
     """Basic transcript cleanup: normalize whitespace, strip artifacts."""
-    import re
-    # Collapse multiple blank lines
-    text = re.sub(r"\n{3,}", "\n\n", raw_text)
-    # Strip leading/trailing whitespace per line
-    lines = [line.strip() for line in text.split("\n")]
-    return "\n".join(lines).strip()
+    # Strip leading/trailing whitespace per line, then collapse blank runs
+    text = "\n".join(line.strip() for line in raw_text.splitlines()).strip()
+    return _MULTI_BLANK.sub("\n\n", text)
@@ -4,20 +4,26 @@ Uses a single-thread ThreadPoolExecutor so jobs queue up and execute
 one at a time — safe for SQLite's single-writer constraint.
 Jobs are stored in-memory; on process restart they are lost,
 but the episode DB status is always the source of truth.
+Finished jobs are evicted after JOB_RETENTION so memory stays bounded
+on long-running servers.
 """
 
 import logging
+import secrets
 import threading
-import uuid
+from collections import OrderedDict
 from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 from flask import Flask
 
 logger = logging.getLogger(__name__)
 
+# How long finished (success/error) jobs stay pollable before eviction
+JOB_RETENTION = timedelta(hours=1)
+
 
 def _utcnow() -> datetime:
     return datetime.now(timezone.utc)
@@ -45,7 +51,10 @@ class JobManager:
         self._executor = ThreadPoolExecutor(
             max_workers=1, thread_name_prefix="btcedu-job",
         )
-        self._jobs: dict[str, Job] = {}
+        # Insertion-ordered so the oldest jobs are evicted first
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        # episode_id -> job_id of its queued/running job
+        self._active_by_episode: dict[str, str] = {}
         self._lock = threading.Lock()
         self._logs_dir = logs_dir
         Path(logs_dir).mkdir(parents=True, exist_ok=True)
@@ -64,7 +73,7 @@ class JobManager:
         dry_run: bool = False,
         top_k: int = 16,
     ) -> Job:
-        job_id = uuid.uuid4().hex[:12]
+        job_id = secrets.token_hex(6)
         job = Job(
             job_id=job_id,
             episode_id=episode_id,
@@ -74,7 +83,9 @@ class JobManager:
             top_k=top_k,
         )
         with self._lock:
+            self._evict_finished()
             self._jobs[job_id] = job
+            self._active_by_episode[episode_id] = job_id
         self._executor.submit(self._execute, job, app)
         logger.info("Job %s submitted: %s %s", job_id, action, episode_id)
         return job
@@ -85,10 +96,16 @@ class JobManager:
 
     def active_for_episode(self, episode_id: str) -> Job | None:
         with self._lock:
-            for job in self._jobs.values():
-                if job.episode_id == episode_id and job.state in ("queued", "running"):
-                    return job
-        return None
+            job_id = self._active_by_episode.get(episode_id)
+            return self._jobs.get(job_id) if job_id else None
+
+    def drain(self, timeout: float | None = None) -> None:
+        """Block until every job submitted so far has finished and been released.
+
+        The executor runs jobs one at a time in submission order, so a no-op
+        queued behind them completes only after they have.
+        """
+        self._executor.submit(lambda: None).result(timeout=timeout)
 
     def shutdown(self) -> None:
         self._executor.shutdown(wait=False)
@@ -97,12 +114,42 @@ class JobManager:
     # Internal helpers
     # ------------------------------------------------------------------
 
-    def _update(self, job: Job, **kwargs) -> None:
+    def _set_state(
+        self, job: Job, state: str, stage: str | None = None, message: str = "",
+    ) -> None:
+        with self._lock:
+            job.state = state
+            if stage is not None:
+                job.stage = stage
+            if message:
+                job.message = message
+            job.updated_at = _utcnow()
+
+    def _set_stage(self, job: Job, stage: str) -> None:
+        with self._lock:
+            job.stage = stage
+            job.updated_at = _utcnow()
+
+    def _set_result(self, job: Job, result: dict) -> None:
         with self._lock:
-            for key, value in kwargs.items():
-                setattr(job, key, value)
+            job.result = result
             job.updated_at = _utcnow()
 
+    def _release(self, job: Job) -> None:
+        """Drop the episode's active-job entry once the job has finished."""
+        with self._lock:
+            if self._active_by_episode.get(job.episode_id) == job.job_id:
+                del self._active_by_episode[job.episode_id]
+
+    def _evict_finished(self) -> None:
+        """Evict finished jobs older than JOB_RETENTION. Caller holds the lock."""
+        cutoff = _utcnow() - JOB_RETENTION
+        while self._jobs:
+            job = next(iter(self._jobs.values()))
+            if job.state not in ("success", "error") or job.updated_at > cutoff:
+                break
+            self._jobs.popitem(last=False)
+
     def _log(self, job: Job, msg: str) -> None:
         ts = _utcnow().strftime("%Y-%m-%d %H:%M:%S")
         line = f"{ts} [{job.action}] {msg}\n"
@@ -123,7 +170,7 @@ class JobManager:
             settings = app.config["settings"]
             session = session_factory()
 
-            self._update(job, state="running", stage="starting")
+            self._set_state(job, "running", stage="starting")
             self._log(job, f"Starting {job.action} for {job.episode_id}")
 
             try:
@@ -144,15 +191,16 @@ class JobManager:
                 else:
                     raise ValueError(f"Unknown action: {job.action}")
 
-                self._update(job, state="success", stage="done")
+                self._set_state(job, "success", stage="done")
                 self._log(job, "Job completed successfully")
 
             except Exception as e:
                 logger.exception("Job %s failed", job.job_id)
-                self._update(job, state="error", message=str(e))
+                self._set_state(job, "error", message=str(e))
                 self._log(job, f"ERROR: {e}")
             finally:
                 session.close()
+                self._release(job)
 
     # ------------------------------------------------------------------
     # Action runners — update stage/result but never set state
@@ -161,45 +209,42 @@ class JobManager:
     def _do_download(self, job, session, settings):
         from btcedu.core.detector import download_episode
 
-        self._update(job, stage="downloading")
+        self._set_stage(job, "downloading")
         self._log(job, "Downloading audio...")
         path = download_episode(session, job.episode_id, settings, force=job.force)
-        self._update(job, result={"success": True, "path": path})
+        self._set_result(job, {"success": True, "path": path})
         self._log(job, f"Download complete: {path}")
 
     def _do_transcribe(self, job, session, settings):
         from btcedu.core.transcriber import transcribe_episode
 
-        self._update(job, stage="transcribing")
+        self._set_stage(job, "transcribing")
         self._log(job, "Transcribing audio...")
         path = transcribe_episode(session, job.episode_id, settings, force=job.force)
-        self._update(job, result={"success": True, "path": path})
+        self._set_result(job, {"success": True, "path": path})
         self._log(job, f"Transcription complete: {path}")
 
     def _do_chunk(self, job, session, settings):
         from btcedu.core.transcriber import chunk_episode
 
-        self._update(job, stage="chunking")
+        self._set_stage(job, "chunking")
         self._log(job, "Chunking transcript...")
         count = chunk_episode(session, job.episode_id, settings, force=job.force)
-        self._update(job, result={"success": True, "count": count})
+        self._set_result(job, {"success": True, "count": count})
         self._log(job, f"Chunking complete: {count} chunks")
 
     def _do_generate(self, job, session, settings):
         from btcedu.core.generator import generate_content
 
-        self._update(job, stage="generating")
+        self._set_stage(job, "generating")
         self._log(job, "Generating content...")
-        original_dry_run = settings.dry_run
-        settings.dry_run = job.dry_run
-        try:
-            result = generate_content(
-                session, job.episode_id, settings,
-                force=job.force, top_k=job.top_k,
-            )
-        finally:
-            settings.dry_run = original_dry_run
-        self._update(job, result={
+        # Settings are frozen and shared; apply the job's dry_run to a copy
+        job_settings = settings.model_copy(update={"dry_run": job.dry_run})
+        result = generate_content(
+            session, job.episode_id, job_settings,
+            force=job.force, top_k=job.top_k,
+        )
+        self._set_result(job, {
             "success": True,
             "artifacts": len(result.artifacts),
             "cost_usd": result.total_cost_usd,
@@ -215,12 +260,12 @@ class JobManager:
     def _do_refine(self, job, session, settings):
         from btcedu.core.generator import refine_content
 
-        self._update(job, stage="refining")
+        self._set_stage(job, "refining")
         self._log(job, "Refining content (v1 -> v2)...")
         result = refine_content(
             session, job.episode_id, settings, force=job.force,
         )
-        self._update(job, result={
+        self._set_result(job, {
             "success": True,
             "artifacts": len(result.artifacts),
             "cost_usd": result.total_cost_usd,
@@ -259,15 +304,15 @@ class JobManager:
         run_stages = [p for p in plan if p.decision in ("run", "pending")]
         if not run_stages:
             self._log(job, "Nothing to do \u2014 all stages already completed")
-            self._update(job, result={"success": True, "message": "Nothing to do"})
+            self._set_result(job, {"success": True, "message": "Nothing to do"})
             return
 
         def on_stage(stage_name):
-            self._update(job, stage=stage_name)
+            self._set_stage(job, stage_name)
             self._log(job, f"Running: {stage_name}")
 
         # Execute via the same function CLI uses
-        self._update(job, stage=run_stages[0].stage)
+        self._set_stage(job, run_stages[0].stage)
         report = run_episode_pipeline(
             session, episode, settings,
             force=job.force, stage_callback=on_stage,
@@ -275,7 +320,7 @@ class JobManager:
         write_report(report, settings.reports_dir)
 
         if report.success:
-            self._update(job, result={
+            self._set_result(job, {
                 "success": True,
                 "cost_usd": report.total_cost_usd,
                 "stages_run": [sr.stage for sr in report.stages if sr.status == "success"],
@@ -302,7 +347,7 @@ class JobManager:
                 f"Nothing to retry (status={episode.status.value}, no error)"
             )
 
-        self._update(job, stage="planning")
+        self._set_stage(job, "planning")
         self._log(job, f"Retrying from status: {episode.status.value}")
         self._log(job, f"Last error: {episode.error_message}")
 
@@ -312,17 +357,17 @@ class JobManager:
             self._log(job, f"Plan: {p.stage} \u2192 {p.decision} ({p.reason})")
 
         def on_stage(stage_name):
-            self._update(job, stage=stage_name)
+            self._set_stage(job, stage_name)
             self._log(job, f"Running: {stage_name}")
 
-        self._update(job, stage="retrying")
+        self._set_stage(job, "retrying")
         report = retry_episode(
             session, job.episode_id, settings, stage_callback=on_stage,
         )
         write_report(report, settings.reports_dir)
 
         if report.success:
-            self._update(job, result={
+            self._set_result(job, {
                 "success": True,
                 "cost_usd": report.total_cost_usd,
                 "stages_run": [sr.stage for sr in report.stages if sr.status == "success"],
@@ -1,44 +1,108 @@
 from pathlib import Path
 
 import pytest
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
 
-from btcedu.db import Base
+from btcedu.config import Settings
+from btcedu.db import Base, _init_fts
 
 FIXTURES = Path(__file__).parent / "fixtures"
 SAMPLE_TRANSCRIPT = (FIXTURES / "sample_transcript_de.txt").read_text()
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def db_engine():
-    """In-memory SQLite engine for tests with FTS5."""
-    engine = create_engine("sqlite:///:memory:")
+    """In-memory SQLite engine for tests with FTS5, schema created once per run."""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, _record):
+        # Let SQLAlchemy emit BEGIN itself so SAVEPOINTs work under pysqlite
+        dbapi_conn.isolation_level = None
+        cur = dbapi_conn.cursor()
+        cur.execute("PRAGMA synchronous=OFF")
+        cur.execute("PRAGMA journal_mode=MEMORY")
+        cur.execute("PRAGMA temp_store=MEMORY")
+        cur.close()
+
+    @event.listens_for(engine, "begin")
+    def _on_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
     Base.metadata.create_all(engine)
-    # Create FTS5 virtual table
-    with engine.connect() as conn:
-        conn.execute(text(
-            "CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts "
-            "USING fts5(chunk_id UNINDEXED, episode_id UNINDEXED, text)"
-        ))
-        conn.commit()
+    _init_fts(engine)
     yield engine
     engine.dispose()
 
 
 @pytest.fixture
 def db_session(db_engine):
-    """Database session for tests."""
-    factory = sessionmaker(bind=db_engine)
-    session = factory()
+    """Database session for tests, rolled back after each test.
+
+    The session joins an outer transaction, so commits made by the code
+    under test only release a SAVEPOINT and never persist across tests.
+    """
+    connection = db_engine.connect()
+    outer = connection.begin()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
     yield session
     session.close()
+    outer.rollback()
+    connection.close()
+
+
+def _data_dirs(root: Path) -> dict[str, str]:
+    return {
+        "outputs_dir": str(root / "outputs"),
+        "reports_dir": str(root / "reports"),
+        "raw_data_dir": str(root / "raw"),
+        "transcripts_dir": str(root / "transcripts"),
+        "chunks_dir": str(root / "chunks"),
+    }
+
+
+@pytest.fixture(scope="session")
+def settings(tmp_path_factory) -> Settings:
+    """Test settings, validated once per run, for tests that never touch the data dirs."""
+    return Settings(
+        anthropic_api_key="sk-ant-test",
+        openai_api_key="sk-test",
+        whisper_api_key="sk-test-fake",
+        audio_format="m4a",
+        dry_run=True,  # Never call real APIs
+        **_data_dirs(tmp_path_factory.mktemp("btcedu")),
+    )
 
 
 @pytest.fixture
-def chunked_episode(db_session):
-    """Episode at CHUNKED status with chunks in DB + FTS5."""
-    from btcedu.core.chunker import chunk_text, persist_chunks
+def tmp_settings(settings, tmp_path) -> Settings:
+    """Copy of ``settings`` with every data directory under this test's tmp_path."""
+    # model_copy skips re-validation; only the per-test dirs change
+    return settings.model_copy(update=_data_dirs(tmp_path))
+
+
+@pytest.fixture(scope="session")
+def sample_chunks():
+    """Chunk records for the sample transcript, computed once per run."""
+    from btcedu.core.chunker import chunk_text
+
+    return tuple(chunk_text(SAMPLE_TRANSCRIPT, "ep001", chunk_size=500))
+
+
+@pytest.fixture
+def chunked_episode(db_session, sample_chunks):
+    """Episode at CHUNKED status with chunks in DB + FTS5.
+
+    Rows are inserted inside the test's rolled-back transaction; only the
+    (immutable) chunk records are shared across tests.
+    """
+    from btcedu.core.chunker import persist_chunks
     from btcedu.models.episode import Episode, EpisodeStatus
 
     episode = Episode(
@@ -52,7 +116,6 @@ def chunked_episode(db_session):
     db_session.add(episode)
     db_session.commit()
 
-    chunks = chunk_text(SAMPLE_TRANSCRIPT, "ep001", chunk_size=500)
-    persist_chunks(db_session, chunks, "ep001")
+    persist_chunks(db_session, list(sample_chunks), "ep001")
 
     return episode
@@ -1,7 +1,11 @@
 """Tests for chunking logic: size, overlap, persistence, FTS search."""
+import functools
 from pathlib import Path
+from unittest.mock import patch
 
+import pytest
 from sqlalchemy import text as sql_text
+from sqlalchemy.orm import Session
 
 from btcedu.config import Settings
 from btcedu.core.chunker import (
@@ -19,6 +23,12 @@ FIXTURES = Path(__file__).parent / "fixtures"
 SAMPLE_TRANSCRIPT = (FIXTURES / "sample_transcript_de.txt").read_text()
 
 
+@functools.cache
+def _chunks(size: int = 1500, overlap: float = 0.15) -> tuple[ChunkRecord, ...]:
+    """SAMPLE_TRANSCRIPT chunked once per (size, overlap) for the whole run."""
+    return tuple(chunk_text(SAMPLE_TRANSCRIPT, "ep001", chunk_size=size, overlap_ratio=overlap))
+
+
 # ── Token estimation ───────────────────────────────────────────────
 
 
@@ -39,12 +49,12 @@ class TestEstimateTokens:
 
 class TestChunkText:
     def test_returns_chunks(self):
-        chunks = chunk_text(SAMPLE_TRANSCRIPT, "ep001", chunk_size=1500, overlap_ratio=0.15)
+        chunks = _chunks()
         assert len(chunks) > 0
         assert all(isinstance(c, ChunkRecord) for c in chunks)
 
     def test_chunk_ids_correct_format(self):
-        chunks = chunk_text(SAMPLE_TRANSCRIPT, "ep001", chunk_size=1500)
+        chunks = _chunks()
         for i, c in enumerate(chunks):
             assert c.chunk_id == f"ep001_{i:03d}"
             assert c.ordinal == i
@@ -52,14 +62,14 @@ class TestChunkText:
 
     def test_chunk_sizes_within_bounds(self):
         """Each chunk should be roughly within chunk_size (allow some flex for sentence breaks)."""
-        chunks = chunk_text(SAMPLE_TRANSCRIPT, "ep001", chunk_size=1500)
+        chunks = _chunks()
         for c in chunks:
             # Allow up to 20% overshoot for sentence-aligned breaks
             assert len(c.text) <= 1500 * 1.2, f"Chunk {c.ordinal} too large: {len(c.text)}"
 
     def test_overlap_exists(self):
         """Adjacent chunks should overlap (share some text)."""
-        chunks = chunk_text(SAMPLE_TRANSCRIPT, "ep001", chunk_size=1500, overlap_ratio=0.15)
+        chunks = _chunks()
         if len(chunks) >= 2:
             # Check that the end of chunk N overlaps with the start of chunk N+1
             for i in range(len(chunks) - 1):
@@ -69,12 +79,12 @@ class TestChunkText:
 
     def test_covers_full_text(self):
         """All chunks together should cover the full text."""
-        chunks = chunk_text(SAMPLE_TRANSCRIPT, "ep001", chunk_size=1500)
+        chunks = _chunks()
         assert chunks[0].start_char == 0
         assert chunks[-1].end_char == len(SAMPLE_TRANSCRIPT)
 
     def test_token_estimates_populated(self):
-        chunks = chunk_text(SAMPLE_TRANSCRIPT, "ep001", chunk_size=1500)
+        chunks = _chunks()
         for c in chunks:
             assert c.token_estimate > 0
             assert c.token_estimate == len(c.text) // 4 or c.token_estimate == max(1, len(c.text) // 4)
@@ -104,7 +114,7 @@ class TestChunkText:
         assert chunks[0].text == "Short text."
 
     def test_custom_chunk_size(self):
-        chunks = chunk_text(SAMPLE_TRANSCRIPT, "ep001", chunk_size=500, overlap_ratio=0.10)
+        chunks = _chunks(500, 0.10)
         # With 500 char chunks, should produce more chunks
         assert len(chunks) > 5
 
@@ -120,7 +130,7 @@ class TestWriteChunksJSONL:
         assert path.endswith("chunks.jsonl")
 
     def test_jsonl_line_count_matches(self, tmp_path):
-        chunks = chunk_text(SAMPLE_TRANSCRIPT, "ep001", chunk_size=1500)
+        chunks = _chunks()
         path = write_chunks_jsonl(chunks, str(tmp_path / "chunks" / "ep001"))
         import json
 
@@ -139,20 +149,33 @@ class TestWriteChunksJSONL:
 
 class TestPersistChunks:
     def test_persists_to_chunks_table(self, db_session):
-        chunks = chunk_text(SAMPLE_TRANSCRIPT, "ep001", chunk_size=1500)
+        chunks = _chunks()
         count = persist_chunks(db_session, chunks, "ep001")
         assert count == len(chunks)
         assert db_session.query(Chunk).count() == len(chunks)
 
     def test_idempotent_repersist(self, db_session):
-        chunks = chunk_text(SAMPLE_TRANSCRIPT, "ep001", chunk_size=1500)
+        chunks = _chunks()
         persist_chunks(db_session, chunks, "ep001")
         persist_chunks(db_session, chunks, "ep001")  # re-persist
         # Should not duplicate
         assert db_session.query(Chunk).count() == len(chunks)
 
+    def test_repersist_updates_in_place_and_drops_stale(self, db_session):
+        chunks = _chunks(500)
+        assert len(chunks) > 1
+        persist_chunks(db_session, chunks, "ep001")
+        first_id = db_session.query(Chunk).filter_by(chunk_id="ep001_000").one().id
+
+        persist_chunks(db_session, chunks[:1], "ep001")
+        db_session.expire_all()
+
+        stored = db_session.query(Chunk).all()
+        assert [c.chunk_id for c in stored] == ["ep001_000"]
+        assert stored[0].id == first_id
+
     def test_chunk_fields_stored(self, db_session):
-        chunks = chunk_text(SAMPLE_TRANSCRIPT, "ep001", chunk_size=1500)
+        chunks = _chunks()
         persist_chunks(db_session, chunks, "ep001")
 
         stored = db_session.query(Chunk).filter_by(chunk_id="ep001_000").first()
@@ -165,42 +188,65 @@ class TestPersistChunks:
         assert len(stored.text) > 0
 
 
-class TestFTSSearch:
-    def test_fts_search_finds_chunks(self, db_session):
-        chunks = chunk_text(SAMPLE_TRANSCRIPT, "ep001", chunk_size=1500)
-        persist_chunks(db_session, chunks, "ep001")
+@pytest.fixture(scope="class")
+def fts_connection(db_engine):
+    """Connection whose outer transaction holds SAMPLE_TRANSCRIPT chunked once per class."""
+    connection = db_engine.connect()
+    outer = connection.begin()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    persist_chunks(session, _chunks(), "ep001")
+    session.close()
+    yield connection
+    outer.rollback()
+    connection.close()
+
+
+@pytest.fixture
+def fts_session(fts_connection):
+    """Session over the seeded class data; changes roll back after each test."""
+    nested = fts_connection.begin_nested()
+    session = Session(bind=fts_connection, join_transaction_mode="create_savepoint")
+    yield session
+    session.close()
+    nested.rollback()
+
 
-        results = search_chunks_fts(db_session, "Bitcoin")
+class TestFTSSearch:
+    def test_fts_search_finds_chunks(self, fts_session):
+        results = search_chunks_fts(fts_session, "Bitcoin")
         assert len(results) > 0
         assert all("chunk_id" in r for r in results)
 
-    def test_fts_search_by_episode(self, db_session):
-        chunks = chunk_text(SAMPLE_TRANSCRIPT, "ep001", chunk_size=1500)
-        persist_chunks(db_session, chunks, "ep001")
-
-        results = search_chunks_fts(db_session, "Bitcoin", episode_id="ep001")
+    def test_fts_search_by_episode(self, fts_session):
+        results = search_chunks_fts(fts_session, "Bitcoin", episode_id="ep001")
         assert len(results) > 0
 
-    def test_fts_search_no_results(self, db_session):
-        chunks = chunk_text(SAMPLE_TRANSCRIPT, "ep001", chunk_size=1500)
-        persist_chunks(db_session, chunks, "ep001")
+    def test_fts_search_ranked_and_limited(self, fts_session):
+        def rec(i, text):
+            return ChunkRecord(
+                chunk_id=f"ep001_{i:03d}", episode_id="ep001", ordinal=i,
+                text=text, token_estimate=10, start_char=0, end_char=len(text),
+            )
 
-        results = search_chunks_fts(db_session, "xyzzythisisnotaword")
-        assert len(results) == 0
+        persist_chunks(fts_session, [
+            rec(0, "Ein Satz ueber Geld und Banken."),
+            rec(1, "Lightning Lightning Lightning Zahlungskanal."),
+            rec(2, "Lightning wird kurz erwaehnt, sonst geht es um Mining und Hashrate."),
+        ], "ep001")
 
-    def test_fts_search_german_words(self, db_session):
-        chunks = chunk_text(SAMPLE_TRANSCRIPT, "ep001", chunk_size=1500)
-        persist_chunks(db_session, chunks, "ep001")
+        results = search_chunks_fts(fts_session, "Lightning", episode_id="ep001", limit=1)
+        assert [r["chunk_id"] for r in results] == ["ep001_001"]
 
-        results = search_chunks_fts(db_session, "Blockchain")
+    def test_fts_search_no_results(self, fts_session):
+        results = search_chunks_fts(fts_session, "xyzzythisisnotaword")
+        assert len(results) == 0
+
+    def test_fts_search_german_words(self, fts_session):
+        results = search_chunks_fts(fts_session, "Blockchain")
         assert len(results) > 0
 
-    def test_fts_cleared_on_repersist(self, db_session):
+    def test_fts_cleared_on_repersist(self, fts_session):
         """Re-persisting should clear old FTS entries."""
-        chunks = chunk_text(SAMPLE_TRANSCRIPT, "ep001", chunk_size=1500)
-        persist_chunks(db_session, chunks, "ep001")
-
-        # Re-persist with different content
         new_chunks = [ChunkRecord(
             chunk_id="ep001_000",
             episode_id="ep001",
@@ -210,17 +256,50 @@ class TestFTSSearch:
             start_char=0,
             end_char=42,
         )]
-        persist_chunks(db_session, new_chunks, "ep001")
+        persist_chunks(fts_session, new_chunks, "ep001")
 
         # Old content should not be findable
-        results = search_chunks_fts(db_session, "Blockchain")
+        results = search_chunks_fts(fts_session, "Blockchain")
         assert len(results) == 0
 
         # New content should be findable
-        results = search_chunks_fts(db_session, "Lightning")
+        results = search_chunks_fts(fts_session, "Lightning")
         assert len(results) > 0
 
 
+class TestFTSSchema:
+    def test_init_db_migrates_inline_fts_table(self, tmp_path):
+        from sqlalchemy import create_engine
+
+        from btcedu.db import Base, init_db
+
+        url = f"sqlite:///{tmp_path / 'old.db'}"
+        engine = create_engine(url)
+        Base.metadata.create_all(engine)
+        with Session(engine) as session:
+            session.add(Chunk(
+                chunk_id="ep001_000", episode_id="ep001", ordinal=0,
+                text="Bitcoin und Lightning.", token_estimate=5,
+                start_char=0, end_char=22,
+            ))
+            session.execute(sql_text(
+                "CREATE VIRTUAL TABLE chunks_fts "
+                "USING fts5(chunk_id UNINDEXED, episode_id UNINDEXED, text)"
+            ))
+            session.commit()
+
+        init_db(url)
+
+        with Session(engine) as session:
+            ddl = session.execute(sql_text(
+                "SELECT sql FROM sqlite_master WHERE name = 'chunks_fts'"
+            )).scalar()
+            assert "content='chunks'" in ddl
+            results = search_chunks_fts(session, "Lightning")
+            assert [r["chunk_id"] for r in results] == ["ep001_000"]
+        engine.dispose()
+
+
 # ── chunk_episode integration ──────────────────────────────────────
 
 
@@ -271,6 +350,24 @@ class TestChunkEpisode:
         ep = db_session.query(Episode).filter_by(episode_id="ep001").first()
         assert ep.status == EpisodeStatus.CHUNKED
 
+    def test_failed_persist_leaves_status_unchanged(self, db_session, tmp_path):
+        self._seed_transcribed(db_session, tmp_path)
+        settings = Settings(
+            transcripts_dir=str(tmp_path / "transcripts"),
+            chunks_dir=str(tmp_path / "chunks"),
+        )
+
+        with patch(
+            "btcedu.core.transcriber.persist_chunks", side_effect=RuntimeError("disk full"),
+        ):
+            with pytest.raises(RuntimeError, match="disk full"):
+                chunk_episode(db_session, "ep001", settings)
+        # A later commit on the same session (next episode in the CLI loop)
+        db_session.commit()
+
+        ep = db_session.query(Episode).filter_by(episode_id="ep001").first()
+        assert ep.status == EpisodeStatus.TRANSCRIBED
+
     def test_skips_if_jsonl_exists(self, db_session, tmp_path):
         self._seed_transcribed(db_session, tmp_path)
         settings = Settings(
@@ -286,7 +383,7 @@ class TestChunkEpisode:
         # Seed some chunks in DB so count returns > 0
         from btcedu.core.chunker import chunk_text, persist_chunks
 
-        chunks = chunk_text(SAMPLE_TRANSCRIPT, "ep001")
+        chunks = _chunks()
         persist_chunks(db_session, chunks, "ep001")
 
         count = chunk_episode(db_session, "ep001", settings)
@@ -294,3 +391,32 @@ class TestChunkEpisode:
         ep = db_session.query(Episode).filter_by(episode_id="ep001").first()
         assert ep.status == EpisodeStatus.CHUNKED
         assert count > 0
+
+    def test_force_rechunks_unchanged_transcript(self, db_session, tmp_path):
+        self._seed_transcribed(db_session, tmp_path)
+        settings = Settings(
+            transcripts_dir=str(tmp_path / "transcripts"),
+            chunks_dir=str(tmp_path / "chunks"),
+        )
+        count = chunk_episode(db_session, "ep001", settings)
+        db_session.query(Chunk).update({Chunk.text: "stale"})
+        db_session.commit()
+
+        again = chunk_episode(db_session, "ep001", settings, force=True)
+
+        assert again == count
+        assert db_session.query(Chunk).filter(Chunk.text == "stale").count() == 0
+
+    def test_force_rechunks_changed_transcript(self, db_session, tmp_path):
+        ep = self._seed_transcribed(db_session, tmp_path)
+        settings = Settings(
+            transcripts_dir=str(tmp_path / "transcripts"),
+            chunks_dir=str(tmp_path / "chunks"),
+        )
+        chunk_episode(db_session, "ep001", settings)
+
+        Path(ep.transcript_path).write_text("Ganz neuer Text ueber Lightning.")
+        count = chunk_episode(db_session, "ep001", settings, force=True)
+
+        assert count == 1
+        assert db_session.query(Chunk).count() == 1
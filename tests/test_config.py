@@ -1,6 +1,9 @@
 import warnings
 
-from btcedu.config import Settings
+import pytest
+from pydantic import ValidationError
+
+from btcedu.config import Settings, get_settings
 
 
 class TestSettings:
@@ -109,3 +112,16 @@ class TestSettings:
         )
         assert settings.anthropic_api_key == "sk-ant-new"
         assert settings.claude_api_key == ""  # cleared after migration
+
+    def test_settings_are_frozen(self):
+        settings = Settings(dry_run=False)
+        with pytest.raises(ValidationError):
+            settings.dry_run = True
+        assert settings.model_copy(update={"dry_run": True}).dry_run is True
+
+    def test_get_settings_is_cached(self):
+        get_settings.cache_clear()
+        try:
+            assert get_settings() is get_settings()
+        finally:
+            get_settings.cache_clear()
@@ -1,6 +1,8 @@
 """Phase 2 tests: feed parsing, detection (idempotent), download, backfill."""
+import functools
 import hashlib
 import json
+import sqlite3
 from datetime import date, datetime, timezone
 from pathlib import Path
 from unittest.mock import MagicMock, patch
@@ -13,13 +15,21 @@ from btcedu.models.schemas import EpisodeInfo
 from btcedu.services.feed_service import (
     _make_fallback_id,
     fetch_channel_videos_ytdlp,
+    load_feed_episodes,
     parse_feed,
     parse_rss,
     parse_youtube_rss,
 )
 
 FIXTURES = Path(__file__).parent / "fixtures"
-SAMPLE_FEED = (FIXTURES / "sample_youtube_feed.xml").read_text()
+SAMPLE_FEED_BYTES = (FIXTURES / "sample_youtube_feed.xml").read_bytes()
+SAMPLE_FEED = SAMPLE_FEED_BYTES.decode("utf-8")
+
+
+@functools.cache
+def _sample_episodes() -> tuple[EpisodeInfo, ...]:
+    """Parse the sample feed once for the read-only extraction tests."""
+    return tuple(parse_youtube_rss(SAMPLE_FEED_BYTES))
 
 
 # ── Feed parsing: YouTube RSS ──────────────────────────────────────
@@ -27,28 +37,28 @@ SAMPLE_FEED = (FIXTURES / "sample_youtube_feed.xml").read_text()
 
 class TestParseYoutubeRSS:
     def test_returns_correct_count(self):
-        episodes = parse_youtube_rss(SAMPLE_FEED)
+        episodes = _sample_episodes()
         assert len(episodes) == 3
 
     def test_extracts_video_id(self):
-        episodes = parse_youtube_rss(SAMPLE_FEED)
+        episodes = _sample_episodes()
         ids = [ep.episode_id for ep in episodes]
         assert "dQw4w9WgXcQ" in ids
         assert "xYz789AbCdE" in ids
         assert "aBcDeFgHiJk" in ids
 
     def test_extracts_title(self):
-        episodes = parse_youtube_rss(SAMPLE_FEED)
+        episodes = _sample_episodes()
         ep = next(e for e in episodes if e.episode_id == "dQw4w9WgXcQ")
         assert "Bitcoin und die Zukunft des Geldes" in ep.title
 
     def test_extracts_url(self):
-        episodes = parse_youtube_rss(SAMPLE_FEED)
+        episodes = _sample_episodes()
         ep = next(e for e in episodes if e.episode_id == "dQw4w9WgXcQ")
         assert ep.url == "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
 
     def test_extracts_published_date(self):
-        episodes = parse_youtube_rss(SAMPLE_FEED)
+        episodes = _sample_episodes()
         ep = next(e for e in episodes if e.episode_id == "dQw4w9WgXcQ")
         assert ep.published_at is not None
         assert ep.published_at.year == 2024
@@ -56,7 +66,7 @@ class TestParseYoutubeRSS:
         assert ep.published_at.day == 15
 
     def test_source_is_youtube_rss(self):
-        episodes = parse_youtube_rss(SAMPLE_FEED)
+        episodes = _sample_episodes()
         for ep in episodes:
             assert ep.source == "youtube_rss"
 
@@ -65,6 +75,30 @@ class TestParseYoutubeRSS:
         episodes = parse_youtube_rss(empty)
         assert episodes == []
 
+    @pytest.mark.parametrize("body", ["", "  \n", b""])
+    def test_empty_body(self, body):
+        assert parse_youtube_rss(body) == []
+
+    def test_truncated_feed_keeps_parsed_entries(self):
+        cut = SAMPLE_FEED.index("</entry>") + len("</entry>")
+        episodes = parse_youtube_rss(SAMPLE_FEED[:cut] + "<entry><title>Half")
+        assert [ep.episode_id for ep in episodes] == [_sample_episodes()[0].episode_id]
+
+    def test_accepts_bytes(self):
+        assert tuple(parse_youtube_rss(SAMPLE_FEED)) == _sample_episodes()
+
+    def test_does_not_resolve_external_entities(self, tmp_path):
+        secret = tmp_path / "secret.txt"
+        secret.write_text("TOPSECRET")
+        feed = SAMPLE_FEED.replace(
+            '<?xml version="1.0" encoding="UTF-8"?>',
+            f'<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<!DOCTYPE feed [<!ENTITY x SYSTEM "{secret.as_uri()}">]>',
+        ).replace("<title>Bitcoin", "<title>&x;Bitcoin", 1)
+        episodes = parse_youtube_rss(feed)
+        assert episodes
+        assert all("TOPSECRET" not in ep.title for ep in episodes)
+
 
 # ── Feed parsing: generic RSS ──────────────────────────────────────
 
@@ -92,9 +126,9 @@ class TestParseGenericRSS:
         episodes = parse_rss(GENERIC_RSS)
         assert len(episodes) == 2
 
-    def test_uses_sha1_fallback_id(self):
+    def test_uses_blake2s_fallback_id(self):
         episodes = parse_rss(GENERIC_RSS)
-        expected_id = hashlib.sha1(b"https://example.com/ep1").hexdigest()[:12]
+        expected_id = hashlib.blake2s(b"https://example.com/ep1", digest_size=6).hexdigest()
         assert episodes[0].episode_id == expected_id
 
     def test_source_is_rss(self):
@@ -106,6 +140,17 @@ class TestParseGenericRSS:
         episodes = parse_rss(GENERIC_RSS)
         assert episodes[0].title == "Episode One"
 
+    def test_extracts_pubdate_as_utc(self):
+        episodes = parse_rss(GENERIC_RSS)
+        assert episodes[0].published_at == datetime(2024, 6, 10, 10, tzinfo=timezone.utc)
+
+    def test_falls_back_for_non_rfc822_dates(self):
+        feed = GENERIC_RSS.replace(
+            "Mon, 10 Jun 2024 10:00:00 +0000", "2024-06-10T12:00:00+02:00"
+        )
+        episodes = parse_rss(feed)
+        assert episodes[0].published_at == datetime(2024, 6, 10, 10, tzinfo=timezone.utc)
+
 
 # ── parse_feed dispatcher ──────────────────────────────────────────
 
@@ -121,6 +166,11 @@ class TestParseFeed:
         assert len(episodes) == 2
         assert episodes[0].source == "rss"
 
+    def test_mislabelled_rss_uses_generic_parser(self):
+        episodes = parse_feed(GENERIC_RSS.encode("utf-8"), "youtube_rss")
+        assert len(episodes) == 2
+        assert episodes[0].source == "rss"
+
 
 # ── Fallback ID helper ─────────────────────────────────────────────
 
@@ -141,6 +191,67 @@ class TestFallbackId:
         assert id1 != id2
 
 
+# ── Feed cache ─────────────────────────────────────────────────────
+
+FEED_URL = "https://www.youtube.com/feeds/videos.xml?channel_id=UCtest"
+
+
+def _mock_response(body: str, etag: str | None = "\"v1\""):
+    resp = MagicMock()
+    resp.read.return_value = body.encode("utf-8")
+    resp.headers = {"ETag": etag} if etag else {}
+    resp.__enter__.return_value = resp
+    return resp
+
+
+class TestLoadFeedEpisodes:
+    @patch("btcedu.services.feed_service.urllib.request.urlopen")
+    def test_without_cache_dir_parses(self, mock_open):
+        mock_open.return_value = _mock_response(SAMPLE_FEED)
+        episodes = load_feed_episodes(FEED_URL, "youtube_rss")
+        assert len(episodes) == 3
+
+    @patch("btcedu.services.feed_service.parse_feed", wraps=parse_feed)
+    @patch("btcedu.services.feed_service.urllib.request.urlopen")
+    def test_unchanged_body_skips_parse(self, mock_open, mock_parse, tmp_path):
+        mock_open.return_value = _mock_response(SAMPLE_FEED)
+        first = load_feed_episodes(FEED_URL, "youtube_rss", cache_dir=str(tmp_path))
+        second = load_feed_episodes(FEED_URL, "youtube_rss", cache_dir=str(tmp_path))
+        assert mock_parse.call_count == 1
+        assert second == first
+
+    @patch("btcedu.services.feed_service.urllib.request.urlopen")
+    def test_sends_etag_and_uses_cache_on_304(self, mock_open, tmp_path):
+        import urllib.error
+
+        mock_open.return_value = _mock_response(SAMPLE_FEED)
+        first = load_feed_episodes(FEED_URL, "youtube_rss", cache_dir=str(tmp_path))
+
+        mock_open.side_effect = urllib.error.HTTPError(FEED_URL, 304, "Not Modified", {}, None)
+        second = load_feed_episodes(FEED_URL, "youtube_rss", cache_dir=str(tmp_path))
+
+        req = mock_open.call_args[0][0]
+        assert req.get_header("If-none-match") == '"v1"'
+        assert second == first
+
+    @patch("btcedu.services.feed_service.urllib.request.urlopen")
+    def test_changed_body_reparses(self, mock_open, tmp_path):
+        mock_open.return_value = _mock_response(SAMPLE_FEED)
+        load_feed_episodes(FEED_URL, "youtube_rss", cache_dir=str(tmp_path))
+
+        empty = '<?xml version="1.0"?><feed xmlns="http://www.w3.org/2005/Atom"></feed>'
+        mock_open.return_value = _mock_response(empty, etag=None)
+        episodes = load_feed_episodes(FEED_URL, "youtube_rss", cache_dir=str(tmp_path))
+        assert episodes == []
+
+    @patch("btcedu.services.feed_service.urllib.request.urlopen")
+    def test_cache_write_leaves_no_temp_files(self, mock_open, tmp_path):
+        mock_open.return_value = _mock_response(SAMPLE_FEED)
+        load_feed_episodes(FEED_URL, "youtube_rss", cache_dir=str(tmp_path))
+        load_feed_episodes(FEED_URL, "youtube_rss", cache_dir=str(tmp_path))
+        assert [p.suffix for p in tmp_path.iterdir()] == [".json"]
+
+
 # ── Detection: idempotent DB inserts ───────────────────────────────
 
 
@@ -201,6 +312,36 @@ class TestDetectFromContent:
         assert result.new == 1
         assert result.total == 4
 
+    def test_skips_rss_episode_stored_under_legacy_sha1_id(self, db_session):
+        legacy_id = hashlib.sha1(b"https://example.com/ep1").hexdigest()[:12]
+        db_session.add(Episode(
+            episode_id=legacy_id,
+            source="rss",
+            title="Episode One",
+            url="https://example.com/ep1",
+        ))
+        db_session.commit()
+
+        result = detect_from_content(db_session, GENERIC_RSS, "rss")
+        assert result.new == 1
+        assert result.total == 2
+
+    def test_large_feed_fits_oldest_sqlite_variable_limit(self, db_session):
+        """Inserts and legacy-ID lookups stay under 999 bound variables."""
+        items = "".join(
+            f"<item><title>Episode {i}</title><link>https://example.com/ep{i}</link></item>"
+            for i in range(1200)
+        )
+        feed = f'<?xml version="1.0"?><rss version="2.0"><channel>{items}</channel></rss>'
+        dbapi_conn = db_session.connection().connection.driver_connection
+        previous = dbapi_conn.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+        try:
+            result = detect_from_content(db_session, feed, "rss")
+        finally:
+            dbapi_conn.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, previous)
+
+        assert result.new == 1200
+
 
 # ── Download: correct path + force flag ────────────────────────────
 
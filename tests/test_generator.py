@@ -7,8 +7,10 @@ from unittest.mock import patch
 import pytest
 
 from btcedu.config import Settings
+from btcedu.core import generator
 from btcedu.core.generator import (
     ARTIFACT_FILENAMES,
+    ARTIFACT_TYPES,
     build_query_terms,
     format_chunks_for_prompt,
     generate_content,
@@ -89,6 +91,10 @@ class TestBuildQueryTerms:
         assert '"Prognosen"' in terms
         assert '"2026"' in terms
 
+    def test_strips_embedded_quotes(self):
+        terms = build_query_terms('Der "Halving"-Effekt 2024/2025')
+        assert terms == ['"Halving"', '"Effekt"', '"2024"', '"2025"']
+
 
 # ── Chunk Retrieval ───────────────────────────────────────────────
 
@@ -147,6 +153,19 @@ class TestGenerateContent:
         for path in result.artifacts:
             assert Path(path).exists()
 
+    @patch("btcedu.core.generator.call_claude")
+    def test_artifacts_recorded_in_pipeline_order(
+        self, mock_claude, db_session, chunked_episode, tmp_path,
+    ):
+        mock_claude.return_value = _mock_claude_response()
+        settings = _make_settings(tmp_path)
+
+        result = generate_content(db_session, "ep001", settings)
+
+        assert [Path(p).name for p in result.artifacts] == [
+            ARTIFACT_FILENAMES[t] for t in ARTIFACT_TYPES
+        ]
+
     @patch("btcedu.core.generator.call_claude")
     def test_creates_retrieval_snapshots(self, mock_claude, db_session, chunked_episode, tmp_path):
         mock_claude.return_value = _mock_claude_response()
@@ -196,7 +215,62 @@ class TestGenerateContent:
         artifacts = db_session.query(ContentArtifact).filter_by(episode_id="ep001").all()
         assert len(artifacts) == 6
         types = {a.artifact_type for a in artifacts}
-        assert types == {"outline", "script", "shorts", "visuals", "qa", "publishing"}
+        assert types == set(ARTIFACT_TYPES)
+
+    @patch("btcedu.core.generator.call_claude")
+    def test_failed_artifact_keeps_rows_for_written_files(
+        self, mock_claude, db_session, chunked_episode, tmp_path,
+    ):
+        """Artifacts that finish alongside a failed one still get their DB rows."""
+        mock_claude.return_value = _mock_claude_response()
+        settings = _make_settings(tmp_path)
+        real_generate = generator._generate_artifact
+
+        def failing_shorts(artifact_type, *args, **kwargs):
+            if artifact_type == "shorts":
+                raise RuntimeError("shorts failed")
+            return real_generate(artifact_type, *args, **kwargs)
+
+        with patch("btcedu.core.generator._generate_artifact", side_effect=failing_shorts):
+            with pytest.raises(RuntimeError, match="shorts failed"):
+                generate_content(db_session, "ep001", settings)
+
+        recorded = {
+            a.artifact_type
+            for a in db_session.query(ContentArtifact).filter_by(episode_id="ep001")
+        }
+        written = {
+            t for t in ARTIFACT_TYPES
+            if (tmp_path / "outputs" / "ep001" / ARTIFACT_FILENAMES[t]).exists()
+        }
+        assert "shorts" not in written
+        assert {"outline", "script"} <= written
+        assert recorded == written
+
+    @patch("btcedu.core.generator.call_claude")
+    def test_failed_visuals_skips_qa_and_publishing(
+        self, mock_claude, db_session, chunked_episode, tmp_path,
+    ):
+        mock_claude.return_value = _mock_claude_response()
+        settings = _make_settings(tmp_path)
+        real_generate = generator._generate_artifact
+        requested = []
+
+        def failing_visuals(artifact_type, *args, **kwargs):
+            requested.append(artifact_type)
+            if artifact_type == "visuals":
+                raise RuntimeError("visuals failed")
+            return real_generate(artifact_type, *args, **kwargs)
+
+        with patch("btcedu.core.generator._generate_artifact", side_effect=failing_visuals):
+            with pytest.raises(RuntimeError, match="visuals failed"):
+                generate_content(db_session, "ep001", settings)
+
+        assert "qa" not in requested
+        assert "publishing" not in requested
+        out = tmp_path / "outputs" / "ep001"
+        assert not (out / ARTIFACT_FILENAMES["qa"]).exists()
+        assert not (out / ARTIFACT_FILENAMES["publishing"]).exists()
 
     @patch("btcedu.core.generator.call_claude")
     def test_skips_existing_artifacts(self, mock_claude, db_session, chunked_episode, tmp_path):
@@ -363,6 +437,19 @@ class TestClaudeService:
         h2 = compute_prompt_hash("template", "model", 0.3, ["a", "b"])
         assert h1 == h2  # sorted internally
 
+    def test_prompt_hash_matches_stored_format(self):
+        import hashlib
+
+        expected = hashlib.sha256(b"template|model|0.3|a,b").hexdigest()
+        assert compute_prompt_hash("template", "model", 0.3, ["b", "a"]) == expected
+
+    def test_client_shared_per_key(self):
+        from btcedu.services.claude_service import _get_client
+
+        client = _get_client("sk-ant-test", 2)
+        assert _get_client("sk-ant-test", 2) is client
+        assert _get_client("sk-ant-other", 2) is not client
+
 
 # ── Format Chunks ─────────────────────────────────────────────────
 
@@ -377,6 +464,16 @@ class TestFormatChunks:
         assert "[ep001_C0001]" in formatted
         assert "Test text" in formatted
 
+    def test_block_layout(self):
+        chunks = [
+            {"chunk_id": "ep001_001", "ordinal": 1, "text": "Eins"},
+            {"chunk_id": "ep001_002", "ordinal": 2, "text": "Zwei"},
+        ]
+        formatted = format_chunks_for_prompt(chunks, "ep001")
+        assert formatted == (
+            "--- [ep001_C0001] ---\nEins\n\n--- [ep001_C0002] ---\nZwei\n"
+        )
+
 
 # ── Refine Content (mocked Claude) ──────────────────────────────
 
@@ -1,5 +1,8 @@
 from datetime import datetime, timezone
 
+from sqlalchemy import text
+
+from btcedu.db import get_engine
 from btcedu.models.episode import (
     Episode,
     EpisodeStatus,
@@ -113,6 +116,17 @@ class TestEpisodeORM:
         assert run.estimated_cost_usd == 0.0
         assert run.started_at is not None
 
+    def test_pending_queue_index(self, db_session):
+        """Pending-episode scans are served by the (status, published_at) index."""
+        index = {ix.name: ix for ix in Episode.__table__.indexes}["ix_episode_status_published"]
+        assert [c.name for c in index.columns] == ["status", "published_at"]
+
+        plan = db_session.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM episodes "
+            "WHERE status IN ('NEW', 'CHUNKED') ORDER BY published_at"
+        )).all()
+        assert any("ix_episode_status_published" in row[-1] for row in plan)
+
 
 class TestPydanticSchemas:
     def test_episode_info(self):
@@ -171,3 +185,13 @@ class TestPydanticSchemas:
         )
         assert status.total_cost_usd == 0.0
         assert status.completed_at is None
+
+
+class TestEngine:
+    def test_sqlite_file_engine_uses_wal(self, tmp_path):
+        engine = get_engine(f"sqlite:///{tmp_path / 'wal.db'}")
+        with engine.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+            assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+            assert conn.exec_driver_sql("PRAGMA cache_size").scalar() == -65536
+        engine.dispose()
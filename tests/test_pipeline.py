@@ -1,17 +1,19 @@
 """Tests for Phase 5 pipeline orchestration."""
 
-import json
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
+import orjson
 import pytest
+from sqlalchemy import insert
 
-from btcedu.config import Settings
+from btcedu.core.detector import DetectResult
 from btcedu.core.pipeline import (
     PipelineReport,
     StagePlan,
     StageResult,
+    _report_to_dict,
     resolve_pipeline_plan,
     retry_episode,
     run_episode_pipeline,
@@ -21,50 +23,82 @@ from btcedu.core.pipeline import (
 )
 from btcedu.models.episode import Episode, EpisodeStatus
 
+JAN_1 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+MAR_1 = datetime(2025, 3, 1, tzinfo=timezone.utc)
+MAY_15 = datetime(2025, 5, 15, tzinfo=timezone.utc)
+JUNE_1 = datetime(2025, 6, 1, tzinfo=timezone.utc)
 
-def _make_settings(tmp_path: Path) -> Settings:
-    return Settings(
-        anthropic_api_key="sk-ant-test",
-        openai_api_key="sk-test",
-        outputs_dir=str(tmp_path / "outputs"),
-        reports_dir=str(tmp_path / "reports"),
-        raw_data_dir=str(tmp_path / "raw"),
-        transcripts_dir=str(tmp_path / "transcripts"),
-        chunks_dir=str(tmp_path / "chunks"),
-        dry_run=True,  # Never call real APIs
-    )
+# Read-only mock return values (the code under test never mutates them)
+MOCK_REPORT_OK = PipelineReport(episode_id="mock", title="mock", success=True)
+MOCK_DETECT_ONE_NEW = DetectResult(found=2, new=1, total=2)
+MOCK_DETECT_EMPTY = DetectResult(found=0, new=0, total=0)
 
 
 @pytest.fixture
-def new_episode(db_session):
+def mock_stage(monkeypatch):
+    """Replace _run_stage with a MagicMock for the test."""
+    mock = MagicMock()
+    monkeypatch.setattr("btcedu.core.pipeline._run_stage", mock)
+    return mock
+
+
+def _episode_fields(episode_id: str, **overrides) -> dict:
+    return {
+        "episode_id": episode_id,
+        "source": "youtube_rss",
+        "title": episode_id,
+        "url": f"https://youtube.com/watch?v={episode_id}",
+        "status": EpisodeStatus.NEW,
+        "published_at": JUNE_1,
+        **overrides,
+    }
+
+
+@pytest.fixture
+def make_episode(db_session):
+    """Factory adding an Episode with default fields to the session (not committed)."""
+
+    def _make(episode_id: str, **overrides) -> Episode:
+        ep = Episode(**_episode_fields(episode_id, **overrides))
+        db_session.add(ep)
+        return ep
+
+    return _make
+
+
+@pytest.fixture
+def insert_episodes(db_session):
+    """Insert episode rows in one Core executemany and commit (no ORM instances).
+
+    For tests that only need the rows to exist for the code under test to query.
+    """
+
+    def _insert(*rows: dict) -> None:
+        db_session.execute(insert(Episode), [_episode_fields(**row) for row in rows])
+        db_session.commit()
+
+    return _insert
+
+
+@pytest.fixture
+def new_episode(db_session, make_episode):
     """Episode at NEW status."""
-    ep = Episode(
-        episode_id="ep_new",
-        source="youtube_rss",
-        title="Bitcoin und Lightning Netzwerk",
-        url="https://youtube.com/watch?v=ep_new",
-        status=EpisodeStatus.NEW,
-        published_at=datetime(2025, 6, 1, tzinfo=timezone.utc),
-    )
-    db_session.add(ep)
+    ep = make_episode("ep_new", title="Bitcoin und Lightning Netzwerk")
     db_session.commit()
     return ep
 
 
 @pytest.fixture
-def failed_episode(db_session):
+def failed_episode(db_session, make_episode):
     """Episode at CHUNKED status with an error (simulating generate failure)."""
-    ep = Episode(
-        episode_id="ep_fail",
-        source="youtube_rss",
+    ep = make_episode(
+        "ep_fail",
         title="Bitcoin Mining Erklaert",
-        url="https://youtube.com/watch?v=ep_fail",
         status=EpisodeStatus.CHUNKED,
-        published_at=datetime(2025, 5, 15, tzinfo=timezone.utc),
+        published_at=MAY_15,
         error_message="Stage 'generate' failed: API timeout",
         retry_count=1,
     )
-    db_session.add(ep)
     db_session.commit()
     return ep
 
@@ -73,10 +107,8 @@ def failed_episode(db_session):
 
 
 class TestRunEpisodePipeline:
-    @patch("btcedu.core.pipeline._run_stage")
-    def test_processes_new_episode_end_to_end(self, mock_stage, db_session, new_episode, tmp_path):
+    def test_processes_new_episode_end_to_end(self, mock_stage, db_session, new_episode, settings):
         mock_stage.return_value = StageResult("mock", "success", 0.1, detail="ok")
-        settings = _make_settings(tmp_path)
 
         report = run_episode_pipeline(db_session, new_episode, settings)
 
@@ -91,25 +123,15 @@ class TestRunEpisodePipeline:
         assert mock_stage.call_count >= 1
         assert report.completed_at is not None
 
-    @patch("btcedu.core.pipeline._run_stage")
-    def test_skips_completed_stages(self, mock_stage, db_session, tmp_path):
+    def test_skips_completed_stages(self, mock_stage, db_session, make_episode, settings):
         """A CHUNKED episode should skip download/transcribe/chunk, run only generate."""
-        ep = Episode(
-            episode_id="ep_chunked",
-            source="youtube_rss",
-            title="Test Chunked",
-            url="https://youtube.com/watch?v=ep_chunked",
-            status=EpisodeStatus.CHUNKED,
-            published_at=datetime(2025, 6, 1, tzinfo=timezone.utc),
-        )
-        db_session.add(ep)
+        ep = make_episode("ep_chunked", title="Test Chunked", status=EpisodeStatus.CHUNKED)
         db_session.commit()
 
         mock_stage.return_value = StageResult(
             "generate", "success", 0.5,
             detail="6 artifacts ($0.0375)",
         )
-        settings = _make_settings(tmp_path)
 
         report = run_episode_pipeline(db_session, ep, settings)
 
@@ -123,12 +145,10 @@ class TestRunEpisodePipeline:
         skipped = [s for s in report.stages if s.status == "skipped"]
         assert len(skipped) == 4
 
-    @patch("btcedu.core.pipeline._run_stage")
-    def test_records_failure_and_increments_retry(self, mock_stage, db_session, new_episode, tmp_path):
+    def test_records_failure_and_increments_retry(self, mock_stage, db_session, new_episode, settings):
         mock_stage.return_value = StageResult(
             "download", "failed", 0.1, error="Connection timeout",
         )
-        settings = _make_settings(tmp_path)
 
         report = run_episode_pipeline(db_session, new_episode, settings)
 
@@ -136,17 +156,15 @@ class TestRunEpisodePipeline:
         assert "download" in report.error
         assert "Connection timeout" in report.error
 
-        db_session.refresh(new_episode)
+        db_session.expire(new_episode, ["retry_count", "error_message"])
         assert new_episode.retry_count == 1
         assert new_episode.error_message is not None
 
-    @patch("btcedu.core.pipeline._run_stage")
-    def test_stops_on_failure(self, mock_stage, db_session, new_episode, tmp_path):
+    def test_stops_on_failure(self, mock_stage, db_session, new_episode, settings):
         """Pipeline should stop after first failed stage."""
         mock_stage.return_value = StageResult(
             "download", "failed", 0.1, error="fail",
         )
-        settings = _make_settings(tmp_path)
 
         report = run_episode_pipeline(db_session, new_episode, settings)
 
@@ -157,18 +175,16 @@ class TestRunEpisodePipeline:
         assert len(attempted) == 1
         assert attempted[0].stage == "download"
 
-    @patch("btcedu.core.pipeline._run_stage")
-    def test_clears_error_on_success(self, mock_stage, db_session, failed_episode, tmp_path):
+    def test_clears_error_on_success(self, mock_stage, db_session, failed_episode, settings):
         """Successful pipeline run clears previous error_message."""
         mock_stage.return_value = StageResult(
             "generate", "success", 0.5, detail="6 artifacts ($0.0375)",
         )
-        settings = _make_settings(tmp_path)
 
         report = run_episode_pipeline(db_session, failed_episode, settings)
 
         assert report.success is True
-        db_session.refresh(failed_episode)
+        db_session.expire(failed_episode, ["error_message"])
         assert failed_episode.error_message is None
 
 
@@ -176,114 +192,56 @@ class TestRunEpisodePipeline:
 
 
 class TestRunPending:
-    @patch("btcedu.core.pipeline.run_episode_pipeline")
-    def test_processes_in_published_at_order(self, mock_run, db_session, tmp_path):
-        """Episodes should be processed oldest first."""
-        ep1 = Episode(
-            episode_id="ep_old", source="youtube_rss", title="Old",
-            url="https://youtube.com/watch?v=old",
-            status=EpisodeStatus.NEW,
-            published_at=datetime(2025, 1, 1, tzinfo=timezone.utc),
-        )
-        ep2 = Episode(
-            episode_id="ep_new", source="youtube_rss", title="New",
-            url="https://youtube.com/watch?v=new",
-            status=EpisodeStatus.NEW,
-            published_at=datetime(2025, 6, 1, tzinfo=timezone.utc),
-        )
-        db_session.add_all([ep2, ep1])  # Add in wrong order
-        db_session.commit()
-
-        mock_run.return_value = PipelineReport(episode_id="mock", title="mock", success=True)
-        settings = _make_settings(tmp_path)
-
-        reports = run_pending(db_session, settings)
-
-        assert len(reports) == 2
-        # Verify order: oldest first
-        call_episodes = [call.args[1].episode_id for call in mock_run.call_args_list]
-        assert call_episodes == ["ep_old", "ep_new"]
-
-    @patch("btcedu.core.pipeline.run_episode_pipeline")
-    def test_respects_max_limit(self, mock_run, db_session, tmp_path):
-        for i in range(5):
-            db_session.add(Episode(
-                episode_id=f"ep_{i}", source="youtube_rss", title=f"Ep {i}",
-                url=f"https://youtube.com/watch?v={i}",
-                status=EpisodeStatus.NEW,
-                published_at=datetime(2025, 1, i + 1, tzinfo=timezone.utc),
-            ))
-        db_session.commit()
-
-        mock_run.return_value = PipelineReport(episode_id="mock", title="mock", success=True)
-        settings = _make_settings(tmp_path)
-
-        reports = run_pending(db_session, settings, max_episodes=2)
-
-        assert len(reports) == 2
-        assert mock_run.call_count == 2
-
-    @patch("btcedu.core.pipeline.run_episode_pipeline")
-    def test_respects_since_filter(self, mock_run, db_session, tmp_path):
-        ep_old = Episode(
-            episode_id="ep_old", source="youtube_rss", title="Old",
-            url="https://youtube.com/watch?v=old",
-            status=EpisodeStatus.NEW,
-            published_at=datetime(2025, 1, 1, tzinfo=timezone.utc),
-        )
-        ep_new = Episode(
-            episode_id="ep_new", source="youtube_rss", title="New",
-            url="https://youtube.com/watch?v=new",
-            status=EpisodeStatus.NEW,
-            published_at=datetime(2025, 6, 1, tzinfo=timezone.utc),
-        )
-        db_session.add_all([ep_old, ep_new])
-        db_session.commit()
-
-        mock_run.return_value = PipelineReport(episode_id="mock", title="mock", success=True)
-        settings = _make_settings(tmp_path)
-
-        since = datetime(2025, 3, 1, tzinfo=timezone.utc)
-        reports = run_pending(db_session, settings, since=since)
-
-        assert len(reports) == 1
-        assert mock_run.call_args[0][1].episode_id == "ep_new"
-
-    @patch("btcedu.core.pipeline.run_episode_pipeline")
-    def test_includes_generated_episodes(self, mock_run, db_session, tmp_path):
-        """GENERATED episodes are pending (need refine stage)."""
-        ep = Episode(
-            episode_id="ep_gen", source="youtube_rss", title="Generated",
-            url="https://youtube.com/watch?v=gen",
-            status=EpisodeStatus.GENERATED,
-            published_at=datetime(2025, 6, 1, tzinfo=timezone.utc),
-        )
-        db_session.add(ep)
-        db_session.commit()
-
-        mock_run.return_value = PipelineReport(episode_id="ep_gen", title="Generated", success=True)
-        settings = _make_settings(tmp_path)
-        reports = run_pending(db_session, settings)
-
-        assert len(reports) == 1
-        mock_run.assert_called_once()
-
-    @patch("btcedu.core.pipeline.run_episode_pipeline")
-    def test_skips_refined_episodes(self, mock_run, db_session, tmp_path):
-        ep = Episode(
-            episode_id="ep_done", source="youtube_rss", title="Done",
-            url="https://youtube.com/watch?v=done",
-            status=EpisodeStatus.REFINED,
-            published_at=datetime(2025, 6, 1, tzinfo=timezone.utc),
-        )
-        db_session.add(ep)
-        db_session.commit()
-
-        settings = _make_settings(tmp_path)
-        reports = run_pending(db_session, settings)
-
-        assert len(reports) == 0
-        mock_run.assert_not_called()
+    @pytest.fixture(autouse=True)
+    def mock_run(self):
+        with patch("btcedu.core.pipeline.run_episode_pipeline") as mock:
+            mock.return_value = MOCK_REPORT_OK
+            yield mock
+
+    @pytest.mark.parametrize("rows,kwargs,expected", [
+        pytest.param(
+            # Added in wrong order
+            [{"episode_id": "ep_new"}, {"episode_id": "ep_old", "published_at": JAN_1}],
+            {},
+            ["ep_old", "ep_new"],
+            id="oldest-first",
+        ),
+        pytest.param(
+            [{"episode_id": f"ep_{i}", "published_at": JAN_1 + timedelta(days=i)}
+             for i in range(5)],
+            {"max_episodes": 2},
+            ["ep_0", "ep_1"],
+            id="max-episodes",
+        ),
+        pytest.param(
+            [{"episode_id": "ep_old", "published_at": JAN_1}, {"episode_id": "ep_new"}],
+            {"since": MAR_1},
+            ["ep_new"],
+            id="since",
+        ),
+        pytest.param(
+            # GENERATED episodes are pending (need refine stage)
+            [{"episode_id": "ep_gen", "status": EpisodeStatus.GENERATED}],
+            {},
+            ["ep_gen"],
+            id="includes-generated",
+        ),
+        pytest.param(
+            [{"episode_id": "ep_done", "status": EpisodeStatus.REFINED}],
+            {},
+            [],
+            id="skips-refined",
+        ),
+    ])
+    def test_selects_pending_episodes(
+        self, mock_run, db_session, insert_episodes, settings, rows, kwargs, expected,
+    ):
+        insert_episodes(*rows)
+
+        reports = run_pending(db_session, settings, **kwargs)
+
+        assert len(reports) == len(expected)
+        assert [call.args[1].episode_id for call in mock_run.call_args_list] == expected
 
 
 # ── RunLatest ────────────────────────────────────────────────────
@@ -292,30 +250,19 @@ class TestRunPending:
 class TestRunLatest:
     @patch("btcedu.core.pipeline.run_episode_pipeline")
     @patch("btcedu.core.detector.detect_episodes")
-    def test_detects_and_processes_newest(self, mock_detect, mock_run, db_session, tmp_path):
-        from btcedu.core.detector import DetectResult
-
-        mock_detect.return_value = DetectResult(found=2, new=1, total=2)
-
-        ep_old = Episode(
-            episode_id="ep_old", source="youtube_rss", title="Old",
-            url="https://youtube.com/watch?v=old",
-            status=EpisodeStatus.NEW,
-            published_at=datetime(2025, 1, 1, tzinfo=timezone.utc),
+    def test_detects_and_processes_newest(
+        self, mock_detect, mock_run, db_session, insert_episodes, settings,
+    ):
+        mock_detect.return_value = MOCK_DETECT_ONE_NEW
+
+        insert_episodes(
+            {"episode_id": "ep_old", "title": "Old", "published_at": JAN_1},
+            {"episode_id": "ep_newest", "title": "Newest"},
         )
-        ep_new = Episode(
-            episode_id="ep_newest", source="youtube_rss", title="Newest",
-            url="https://youtube.com/watch?v=newest",
-            status=EpisodeStatus.NEW,
-            published_at=datetime(2025, 6, 1, tzinfo=timezone.utc),
-        )
-        db_session.add_all([ep_old, ep_new])
-        db_session.commit()
 
         mock_run.return_value = PipelineReport(
             episode_id="ep_newest", title="Newest", success=True,
         )
-        settings = _make_settings(tmp_path)
 
         result = run_latest(db_session, settings)
 
@@ -327,11 +274,8 @@ class TestRunLatest:
         assert mock_run.call_args[0][1].episode_id == "ep_newest"
 
     @patch("btcedu.core.detector.detect_episodes")
-    def test_returns_none_when_nothing_pending(self, mock_detect, db_session, tmp_path):
-        from btcedu.core.detector import DetectResult
-
-        mock_detect.return_value = DetectResult(found=0, new=0, total=0)
-        settings = _make_settings(tmp_path)
+    def test_returns_none_when_nothing_pending(self, mock_detect, db_session, settings):
+        mock_detect.return_value = MOCK_DETECT_EMPTY
 
         result = run_latest(db_session, settings)
 
@@ -342,13 +286,11 @@ class TestRunLatest:
 
 
 class TestRetryEpisode:
-    @patch("btcedu.core.pipeline._run_stage")
-    def test_retries_from_failed_stage(self, mock_stage, db_session, failed_episode, tmp_path):
+    def test_retries_from_failed_stage(self, mock_stage, db_session, failed_episode, settings):
         """Failed CHUNKED episode should retry from generate stage."""
         mock_stage.return_value = StageResult(
             "generate", "success", 0.5, detail="6 artifacts ($0.0375)",
         )
-        settings = _make_settings(tmp_path)
 
         report = retry_episode(db_session, "ep_fail", settings)
 
@@ -356,25 +298,17 @@ class TestRetryEpisode:
         # Only generate should run (download/transcribe/chunk skipped)
         assert mock_stage.call_count == 1
 
-        db_session.refresh(failed_episode)
+        db_session.expire(failed_episode, ["error_message"])
         assert failed_episode.error_message is None
 
-    def test_rejects_non_failed_episode(self, db_session, tmp_path):
-        ep = Episode(
-            episode_id="ep_ok", source="youtube_rss", title="OK",
-            url="https://youtube.com/watch?v=ok",
-            status=EpisodeStatus.NEW,
-            published_at=datetime(2025, 6, 1, tzinfo=timezone.utc),
-        )
-        db_session.add(ep)
+    def test_rejects_non_failed_episode(self, db_session, make_episode, settings):
+        ep = make_episode("ep_ok", title="OK")
         db_session.commit()
 
-        settings = _make_settings(tmp_path)
         with pytest.raises(ValueError, match="not in a failed state"):
             retry_episode(db_session, "ep_ok", settings)
 
-    def test_rejects_unknown_episode(self, db_session, tmp_path):
-        settings = _make_settings(tmp_path)
+    def test_rejects_unknown_episode(self, db_session, settings):
         with pytest.raises(ValueError, match="Episode not found"):
             retry_episode(db_session, "nonexistent", settings)
 
@@ -382,57 +316,57 @@ class TestRetryEpisode:
 # ── WriteReport ──────────────────────────────────────────────────
 
 
+def _make_report(**overrides) -> PipelineReport:
+    fields = {
+        "episode_id": "ep001",
+        "title": "Test Episode",
+        "started_at": JUNE_1,
+        "completed_at": JUNE_1,
+        "success": True,
+        **overrides,
+    }
+    return PipelineReport(**fields)
+
+
 class TestWriteReport:
-    def test_creates_report_json(self, tmp_path):
-        report = PipelineReport(
-            episode_id="ep001",
-            title="Test Episode",
-            success=True,
+    def test_serializes_report_fields(self):
+        report = _make_report(
             total_cost_usd=0.038,
             stages=[
                 StageResult("download", "success", 1.2, detail="/path/audio.m4a"),
                 StageResult("generate", "success", 5.0, detail="6 artifacts ($0.038)"),
             ],
         )
-        report.completed_at = report.started_at
 
-        path = write_report(report, str(tmp_path / "reports"))
+        data = _report_to_dict(report)
 
-        assert Path(path).exists()
-        data = json.loads(Path(path).read_text())
         assert data["episode_id"] == "ep001"
         assert data["success"] is True
+        assert data["error"] is None
         assert len(data["stages"]) == 2
+        assert data["stages"][0]["detail"] == "/path/audio.m4a"
 
-    def test_report_contains_required_fields(self, tmp_path):
-        report = PipelineReport(
-            episode_id="ep002",
-            title="Another Episode",
-            success=False,
-            error="Stage 'download' failed: timeout",
-        )
-        report.completed_at = report.started_at
+    def test_report_contains_required_fields(self):
+        report = _make_report(success=False, error="Stage 'download' failed: timeout")
 
-        path = write_report(report, str(tmp_path / "reports"))
+        data = _report_to_dict(report)
 
-        data = json.loads(Path(path).read_text())
-        required = {"episode_id", "title", "started_at", "completed_at",
-                     "success", "error", "total_cost_usd", "stages"}
-        assert required.issubset(data.keys())
+        required = {
+            "episode_id", "title", "started_at", "completed_at",
+            "success", "error", "total_cost_usd", "stages",
+        }
+        assert required <= data.keys()
         assert data["error"] == "Stage 'download' failed: timeout"
 
     def test_report_dir_created(self, tmp_path):
-        """Reports dir is created if it doesn't exist."""
-        report = PipelineReport(
-            episode_id="ep003", title="New Dir Test", success=True,
-        )
-        report.completed_at = report.started_at
+        """Reports dir is created if it doesn't exist, and the JSON round-trips."""
+        report = _make_report(episode_id="ep003", title="New Dir Test")
 
         reports_dir = tmp_path / "new_reports"
         path = write_report(report, str(reports_dir))
 
-        assert Path(path).exists()
-        assert "ep003" in path
+        assert path == str(reports_dir / "ep003" / "report_20250601_000000.json")
+        assert orjson.loads(Path(path).read_bytes()) == _report_to_dict(report)
 
 
 # ── ResolvePipelinePlan ─────────────────────────────────────────
@@ -448,83 +382,43 @@ class TestResolvePipelinePlan:
         assert plan[3] == StagePlan("generate", "pending", "after prior stages")
         assert plan[4] == StagePlan("refine", "pending", "after prior stages")
 
-    def test_downloaded_skips_download(self, db_session):
-        ep = Episode(
-            episode_id="ep_dl", source="youtube_rss", title="Downloaded",
-            url="https://youtube.com/watch?v=dl",
-            status=EpisodeStatus.DOWNLOADED,
-            published_at=datetime(2025, 6, 1, tzinfo=timezone.utc),
-        )
-        db_session.add(ep)
+    @pytest.mark.parametrize("status,force,expected,key_stage", [
+        (
+            EpisodeStatus.DOWNLOADED, False,
+            ["skip", "run", "pending", "pending", "pending"],
+            StagePlan("download", "skip", "already completed"),
+        ),
+        (
+            EpisodeStatus.CHUNKED, False,
+            ["skip", "skip", "skip", "run", "pending"],
+            StagePlan("generate", "run", "status=chunked"),
+        ),
+        (
+            EpisodeStatus.GENERATED, False,
+            ["skip", "skip", "skip", "skip", "run"],
+            StagePlan("refine", "run", "status=generated"),
+        ),
+        (
+            EpisodeStatus.REFINED, False,
+            ["skip"] * 5,
+            None,
+        ),
+        (
+            EpisodeStatus.REFINED, True,
+            ["run"] * 5,
+            StagePlan("download", "run", "forced"),
+        ),
+    ])
+    def test_plan_decisions_by_status(
+        self, db_session, make_episode, status, force, expected, key_stage,
+    ):
+        ep = make_episode("ep_plan", status=status)
         db_session.commit()
 
-        plan = resolve_pipeline_plan(db_session, ep)
-        assert plan[0] == StagePlan("download", "skip", "already completed")
-        assert plan[1].decision == "run"
-        assert plan[2].decision == "pending"
-        assert plan[3].decision == "pending"
-        assert plan[4].decision == "pending"
-
-    def test_chunked_skips_three(self, db_session):
-        ep = Episode(
-            episode_id="ep_ch", source="youtube_rss", title="Chunked",
-            url="https://youtube.com/watch?v=ch",
-            status=EpisodeStatus.CHUNKED,
-            published_at=datetime(2025, 6, 1, tzinfo=timezone.utc),
-        )
-        db_session.add(ep)
-        db_session.commit()
-
-        plan = resolve_pipeline_plan(db_session, ep)
-        skipped = [p for p in plan if p.decision == "skip"]
-        assert len(skipped) == 3
-        assert plan[3] == StagePlan("generate", "run", "status=chunked")
-        assert plan[4] == StagePlan("refine", "pending", "after prior stages")
-
-    def test_generated_runs_refine(self, db_session):
-        ep = Episode(
-            episode_id="ep_gen", source="youtube_rss", title="Generated",
-            url="https://youtube.com/watch?v=gen",
-            status=EpisodeStatus.GENERATED,
-            published_at=datetime(2025, 6, 1, tzinfo=timezone.utc),
-        )
-        db_session.add(ep)
-        db_session.commit()
-
-        plan = resolve_pipeline_plan(db_session, ep)
-        # download/transcribe/chunk/generate skipped, refine runs
-        skipped = [p for p in plan if p.decision == "skip"]
-        assert len(skipped) == 4
-        assert plan[4] == StagePlan("refine", "run", "status=generated")
-
-    def test_refined_skips_all(self, db_session):
-        ep = Episode(
-            episode_id="ep_ref", source="youtube_rss", title="Refined",
-            url="https://youtube.com/watch?v=ref",
-            status=EpisodeStatus.REFINED,
-            published_at=datetime(2025, 6, 1, tzinfo=timezone.utc),
-        )
-        db_session.add(ep)
-        db_session.commit()
-
-        plan = resolve_pipeline_plan(db_session, ep)
-        assert all(p.decision == "skip" for p in plan)
-
-    def test_force_overrides_skips(self, db_session):
-        ep = Episode(
-            episode_id="ep_force", source="youtube_rss", title="Force",
-            url="https://youtube.com/watch?v=force",
-            status=EpisodeStatus.REFINED,
-            published_at=datetime(2025, 6, 1, tzinfo=timezone.utc),
-        )
-        db_session.add(ep)
-        db_session.commit()
-
-        plan = resolve_pipeline_plan(db_session, ep, force=True)
-        assert all(p.decision == "run" for p in plan)
-        assert len(plan) == 5
-        assert plan[0].reason == "forced"
-        assert plan[4].reason == "forced"
+        plan = resolve_pipeline_plan(db_session, ep, force=force)
+        assert [p.decision for p in plan] == expected
+        if key_stage is not None:
+            assert key_stage in plan
 
     def test_plan_with_error_still_resolves(self, db_session, failed_episode):
         """Pipeline plan ignores error_message — only looks at status."""
@@ -537,22 +431,14 @@ class TestResolvePipelinePlan:
         assert plan[4].decision == "pending"
         assert plan[4].stage == "refine"
 
-    @patch("btcedu.core.pipeline._run_stage")
-    def test_stage_callback_invoked(self, mock_stage, db_session, tmp_path):
+    def test_stage_callback_invoked(self, mock_stage, db_session, make_episode, settings):
         """stage_callback is called before each stage that runs."""
-        ep = Episode(
-            episode_id="ep_cb", source="youtube_rss", title="Callback",
-            url="https://youtube.com/watch?v=cb",
-            status=EpisodeStatus.CHUNKED,
-            published_at=datetime(2025, 6, 1, tzinfo=timezone.utc),
-        )
-        db_session.add(ep)
+        ep = make_episode("ep_cb", title="Callback", status=EpisodeStatus.CHUNKED)
         db_session.commit()
 
         mock_stage.return_value = StageResult(
             "generate", "success", 0.5, detail="6 artifacts ($0.0375)",
         )
-        settings = _make_settings(tmp_path)
         called_stages = []
         run_episode_pipeline(
             db_session, ep, settings,
@@ -1,19 +1,12 @@
 """Tests for transcription pipeline stage."""
-from pathlib import Path
-from unittest.mock import patch
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import insert, select
 
-from btcedu.config import Settings
 from btcedu.core.transcriber import transcribe_episode
 from btcedu.models.episode import Episode, EpisodeStatus
-
-
-def _make_settings(tmp_path: Path) -> Settings:
-    return Settings(
-        whisper_api_key="sk-test-fake",
-        transcripts_dir=str(tmp_path / "transcripts"),
-        raw_data_dir=str(tmp_path / "raw"),
-        audio_format="m4a",
-    )
+from btcedu.services.transcription_service import clean_transcript
 
 
 def _seed_downloaded_episode(db_session, tmp_path, episode_id="ep001"):
@@ -23,59 +16,61 @@ def _seed_downloaded_episode(db_session, tmp_path, episode_id="ep001"):
     audio_file = audio_dir / "audio.m4a"
     audio_file.write_bytes(b"fake audio content")
 
-    ep = Episode(
+    db_session.execute(insert(Episode).values(
         episode_id=episode_id,
         source="youtube_rss",
         title="Test Episode",
         url=f"https://youtube.com/watch?v={episode_id}",
         status=EpisodeStatus.DOWNLOADED,
         audio_path=str(audio_file),
-    )
-    db_session.add(ep)
+    ))
     db_session.commit()
-    return ep
+
+
+def _get_episode(db_session, episode_id="ep001"):
+    return db_session.scalar(select(Episode).where(Episode.episode_id == episode_id))
+
+
+@pytest.fixture
+def mock_whisper(monkeypatch):
+    """Replace the Whisper API call with a MagicMock for the test."""
+    mock = MagicMock()
+    monkeypatch.setattr("btcedu.services.transcription_service.transcribe_audio", mock)
+    return mock
 
 
 class TestTranscribeEpisode:
-    @patch("btcedu.services.transcription_service.transcribe_audio")
-    def test_creates_transcript_files(self, mock_whisper, db_session, tmp_path):
-        settings = _make_settings(tmp_path)
+    def test_creates_transcript_files(self, mock_whisper, db_session, tmp_path, tmp_settings):
         _seed_downloaded_episode(db_session, tmp_path)
         mock_whisper.return_value = "Bitcoin ist eine dezentrale Waehrung."
 
-        path = transcribe_episode(db_session, "ep001", settings)
+        path = transcribe_episode(db_session, "ep001", tmp_settings)
 
         transcript_dir = tmp_path / "transcripts" / "ep001"
         assert (transcript_dir / "transcript.de.txt").exists()
         assert (transcript_dir / "transcript.clean.de.txt").exists()
         assert path == str(transcript_dir / "transcript.clean.de.txt")
 
-    @patch("btcedu.services.transcription_service.transcribe_audio")
-    def test_updates_status_to_transcribed(self, mock_whisper, db_session, tmp_path):
-        settings = _make_settings(tmp_path)
+    def test_updates_status_to_transcribed(self, mock_whisper, db_session, tmp_path, tmp_settings):
         _seed_downloaded_episode(db_session, tmp_path)
         mock_whisper.return_value = "Test transcript text."
 
-        transcribe_episode(db_session, "ep001", settings)
+        transcribe_episode(db_session, "ep001", tmp_settings)
 
-        ep = db_session.query(Episode).filter_by(episode_id="ep001").first()
+        ep = _get_episode(db_session)
         assert ep.status == EpisodeStatus.TRANSCRIBED
         assert ep.transcript_path is not None
 
-    @patch("btcedu.services.transcription_service.transcribe_audio")
-    def test_stores_transcript_path_in_db(self, mock_whisper, db_session, tmp_path):
-        settings = _make_settings(tmp_path)
+    def test_stores_transcript_path_in_db(self, mock_whisper, db_session, tmp_path, tmp_settings):
         _seed_downloaded_episode(db_session, tmp_path)
         mock_whisper.return_value = "Some text."
 
-        transcribe_episode(db_session, "ep001", settings)
+        transcribe_episode(db_session, "ep001", tmp_settings)
 
-        ep = db_session.query(Episode).filter_by(episode_id="ep001").first()
+        ep = _get_episode(db_session)
         assert "transcript.clean.de.txt" in ep.transcript_path
 
-    @patch("btcedu.services.transcription_service.transcribe_audio")
-    def test_skips_if_transcript_exists(self, mock_whisper, db_session, tmp_path):
-        settings = _make_settings(tmp_path)
+    def test_skips_if_transcript_exists(self, mock_whisper, db_session, tmp_path, tmp_settings):
         _seed_downloaded_episode(db_session, tmp_path)
 
         # Pre-create transcript file
@@ -83,14 +78,12 @@ class TestTranscribeEpisode:
         transcript_dir.mkdir(parents=True)
         (transcript_dir / "transcript.clean.de.txt").write_text("existing")
 
-        path = transcribe_episode(db_session, "ep001", settings)
+        path = transcribe_episode(db_session, "ep001", tmp_settings)
 
         mock_whisper.assert_not_called()
         assert path == str(transcript_dir / "transcript.clean.de.txt")
 
-    @patch("btcedu.services.transcription_service.transcribe_audio")
-    def test_force_retranscribes(self, mock_whisper, db_session, tmp_path):
-        settings = _make_settings(tmp_path)
+    def test_force_retranscribes(self, mock_whisper, db_session, tmp_path, tmp_settings):
         _seed_downloaded_episode(db_session, tmp_path)
         mock_whisper.return_value = "New transcript."
 
@@ -99,23 +92,17 @@ class TestTranscribeEpisode:
         transcript_dir.mkdir(parents=True)
         (transcript_dir / "transcript.clean.de.txt").write_text("old")
 
-        transcribe_episode(db_session, "ep001", settings, force=True)
+        transcribe_episode(db_session, "ep001", tmp_settings, force=True)
 
         mock_whisper.assert_called_once()
         content = (transcript_dir / "transcript.clean.de.txt").read_text()
         assert content == "New transcript."
 
-    def test_raises_for_unknown_episode(self, db_session, tmp_path):
-        import pytest
-
-        settings = _make_settings(tmp_path)
+    def test_raises_for_unknown_episode(self, db_session, settings):
         with pytest.raises(ValueError, match="Episode not found"):
             transcribe_episode(db_session, "nonexistent", settings)
 
-    def test_raises_for_wrong_status(self, db_session, tmp_path):
-        import pytest
-
-        settings = _make_settings(tmp_path)
+    def test_raises_for_wrong_status(self, db_session, settings):
         ep = Episode(
             episode_id="ep001",
             source="youtube_rss",
@@ -129,16 +116,23 @@ class TestTranscribeEpisode:
         with pytest.raises(ValueError, match="expected 'downloaded'"):
             transcribe_episode(db_session, "ep001", settings)
 
-    def test_raises_without_api_key(self, db_session, tmp_path):
-        import pytest
-
-        settings = Settings(
-            whisper_api_key="",
-            openai_api_key="",
-            transcripts_dir=str(tmp_path / "transcripts"),
-            raw_data_dir=str(tmp_path / "raw"),
-        )
+    def test_raises_without_api_key(self, db_session, tmp_path, tmp_settings):
+        settings = tmp_settings.model_copy(update={"whisper_api_key": "", "openai_api_key": ""})
         _seed_downloaded_episode(db_session, tmp_path)
 
         with pytest.raises(ValueError, match="No Whisper API key"):
             transcribe_episode(db_session, "ep001", settings)
+
+
+class TestCleanTranscript:
+    def test_strips_lines(self):
+        assert clean_transcript("  Hallo  \n\tWelt \n") == "Hallo\nWelt"
+
+    def test_collapses_blank_runs(self):
+        assert clean_transcript("Eins\n\n\n\nZwei") == "Eins\n\nZwei"
+
+    def test_collapses_whitespace_only_lines(self):
+        assert clean_transcript("Eins\n  \n \t\n\nZwei") == "Eins\n\nZwei"
+
+    def test_normalizes_crlf(self):
+        assert clean_transcript("Eins\r\nZwei\r\n") == "Eins\nZwei"
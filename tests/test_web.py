@@ -1,77 +1,123 @@
 """Tests for the btcedu web dashboard API endpoints."""
 
-import json
+import sqlite3
 import threading
-import time
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock
 
+import orjson
 import pytest
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, insert, select
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
+import btcedu.web
 from btcedu.config import Settings
-from btcedu.db import Base
+from btcedu.core import detector
+from btcedu.db import Base, _init_fts
 from btcedu.models.episode import Episode, EpisodeStatus, PipelineRun, PipelineStage, RunStatus
-
-
-@pytest.fixture
-def test_settings(tmp_path):
-    """Settings with temp directories and no .env loading."""
-    return Settings(
+from btcedu.web.app import create_app
+from btcedu.web.jobs import JOB_RETENTION, Job, JobManager
+
+# Content checks read the shipped files directly; the route tests cover serving
+WEB_DIR = Path(btcedu.web.__file__).parent
+
+ACTION_LOG = (
+    b"2026-02-12 10:00:00 [download] Starting...\n"
+    b"2026-02-12 10:00:05 [download] Complete\n"
+)
+TAIL_LOG = "".join(f"line {i}\n" for i in range(50)).encode()
+
+
+def _data_dirs(root: Path) -> dict[str, str]:
+    return {
+        "raw_data_dir": str(root / "raw"),
+        "transcripts_dir": str(root / "transcripts"),
+        "chunks_dir": str(root / "chunks"),
+        "outputs_dir": str(root / "outputs"),
+        "reports_dir": str(root / "reports"),
+        "logs_dir": str(root / "logs"),
+    }
+
+
+@pytest.fixture(scope="session")
+def base_app(tmp_path_factory):
+    """Flask app built once per run; ``app`` swaps in the per-test state."""
+    settings = Settings(
         anthropic_api_key="test-key",
         openai_api_key="test-key",
         database_url="sqlite:///:memory:",
-        raw_data_dir=str(tmp_path / "raw"),
-        transcripts_dir=str(tmp_path / "transcripts"),
-        chunks_dir=str(tmp_path / "chunks"),
-        outputs_dir=str(tmp_path / "outputs"),
-        reports_dir=str(tmp_path / "reports"),
-        logs_dir=str(tmp_path / "logs"),
+        **_data_dirs(tmp_path_factory.mktemp("web")),
     )
+    application = create_app(settings=settings)
+    application.config["TESTING"] = True
+    yield application
+    application.config["job_manager"].shutdown()
 
 
 @pytest.fixture
-def test_db():
-    """In-memory SQLite engine + session factory (shared across threads)."""
-    engine = create_engine(
-        "sqlite:///:memory:",
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
-    )
+def test_settings(base_app, tmp_path):
+    """Settings with temp directories and no .env loading."""
+    # model_copy skips re-validation; only the per-test dirs change
+    return base_app.config["settings"].model_copy(update=_data_dirs(tmp_path))
+
+
+def _snapshot(engine) -> sqlite3.Connection:
+    """Copy an in-memory engine's database into a standalone connection."""
+    template = sqlite3.connect(":memory:")
+    engine.raw_connection().driver_connection.backup(template)
+    engine.dispose()
+    return template
+
+
+@pytest.fixture(scope="session")
+def schema_template():
+    """In-memory SQLite connection holding the full schema, built once per run."""
+    engine = create_engine("sqlite://", poolclass=StaticPool)
     Base.metadata.create_all(engine)
-    with engine.connect() as conn:
-        conn.execute(text(
-            "CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts "
-            "USING fts5(chunk_id UNINDEXED, episode_id UNINDEXED, text)"
-        ))
-        conn.commit()
-    factory = sessionmaker(bind=engine)
-    return engine, factory
+    _init_fts(engine)
+    template = _snapshot(engine)
+    yield template
+    template.close()
 
 
-@pytest.fixture
-def seeded_db(test_db):
-    """DB with a few episodes at different statuses."""
-    engine, factory = test_db
+def _clone_engine(template: sqlite3.Connection):
+    """Fresh in-memory engine whose database is a page copy of ``template``."""
+
+    def connect():
+        conn = sqlite3.connect(":memory:", check_same_thread=False)
+        template.backup(conn)
+        # Same throwaway-DB pragmas as the conftest engine
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("PRAGMA journal_mode=MEMORY")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    return create_engine("sqlite://", creator=connect, poolclass=StaticPool)
+
+
+@pytest.fixture(scope="session")
+def seeded_template(schema_template):
+    """Template database with a few episodes at different statuses, seeded once."""
+    engine = _clone_engine(schema_template)
+    factory = sessionmaker(bind=engine)
     session = factory()
-    episodes = [
-        Episode(
+    session.execute(insert(Episode), [
+        dict(
             episode_id="ep001",
             source="youtube_rss",
             title="Bitcoin Basics",
             url="https://youtube.com/watch?v=ep001",
             status=EpisodeStatus.GENERATED,
         ),
-        Episode(
+        dict(
             episode_id="ep002",
             source="youtube_rss",
             title="Lightning Network",
             url="https://youtube.com/watch?v=ep002",
             status=EpisodeStatus.NEW,
         ),
-        Episode(
+        dict(
             episode_id="ep003",
             source="youtube_rss",
             title="Mining Deep Dive",
@@ -80,42 +126,69 @@ def seeded_db(test_db):
             error_message="Stage 'generate' failed: API error",
             retry_count=1,
         ),
-    ]
-    session.add_all(episodes)
-    session.commit()
+    ])
 
     # Add a pipeline run for cost testing
-    run = PipelineRun(
-        episode_id=episodes[0].id,
+    session.execute(insert(PipelineRun).values(
+        episode_id=session.scalar(select(Episode.id).where(Episode.episode_id == "ep001")),
         stage=PipelineStage.GENERATE,
         status=RunStatus.SUCCESS,
         input_tokens=5000,
         output_tokens=2000,
         estimated_cost_usd=0.045,
-    )
-    session.add(run)
+    ))
     session.commit()
     session.close()
-    return engine, factory
+
+    template = _snapshot(engine)
+    yield template
+    template.close()
 
 
 @pytest.fixture
-def app(test_settings, seeded_db):
-    """Flask test app with mocked DB."""
-    from btcedu.web.app import create_app
+def seeded_db(seeded_template):
+    """Per-test copy of the seeded DB: engine + session factory (shared across threads)."""
+    engine = _clone_engine(seeded_template)
+    return engine, sessionmaker(bind=engine)
 
+
+@pytest.fixture
+def app(base_app, test_settings, seeded_db):
+    """Shared Flask app with this test's settings, seeded DB and job manager."""
     _engine, factory = seeded_db
-    application = create_app(settings=test_settings)
-    # Override session factory to use our seeded DB
-    application.config["session_factory"] = factory
-    application.config["TESTING"] = True
-    return application
+    job_manager = JobManager(test_settings.logs_dir)
+    base_app.config.update(
+        settings=test_settings,
+        session_factory=factory,
+        job_manager=job_manager,
+    )
+    yield base_app
+    # Jobs read settings/session_factory from the shared config when they
+    # run, so let this test's jobs finish before the next test swaps them
+    job_manager.drain(timeout=10)
+    job_manager.shutdown()
+
+
+@pytest.fixture(scope="session")
+def base_client(base_app):
+    """One test client for the run; the tests don't rely on cookies."""
+    return base_app.test_client()
 
 
 @pytest.fixture
-def client(app):
-    """Flask test client."""
-    return app.test_client()
+def client(app, base_client):
+    """Flask test client, bound to the per-test state set up by ``app``."""
+    return base_client
+
+
+def _instant_download(session, episode_id, settings, force=False):
+    return "/tmp/audio.m4a"
+
+
+def wait_for_job(client, app, job_id: str) -> dict:
+    """Wait for the background queue to empty, then return the job's JSON."""
+    app.config["job_manager"].drain(timeout=5)
+    return client.get(f"/api/jobs/{job_id}").get_json()
 
 
 # ---------------------------------------------------------------------------
@@ -136,9 +209,8 @@ class TestHealthAndStaticAssets:
         assert r.status_code == 200
         assert b"btcedu" in r.data
 
-    def test_index_uses_relative_static_paths(self, client):
-        r = client.get("/")
-        html = r.data.decode()
+    def test_index_uses_relative_static_paths(self):
+        html = (WEB_DIR / "templates" / "index.html").read_text(encoding="utf-8")
         # Must NOT use absolute /static/ paths (breaks reverse proxy)
         assert 'href="/static/' not in html
         assert 'src="/static/' not in html
@@ -156,9 +228,8 @@ class TestHealthAndStaticAssets:
         assert r.status_code == 200
         assert b"btcedu" in r.data
 
-    def test_js_uses_relative_api_paths(self, client):
-        r = client.get("/static/app.js")
-        js = r.data.decode()
+    def test_js_uses_relative_api_paths(self):
+        js = (WEB_DIR / "static" / "app.js").read_text(encoding="utf-8")
         # Must NOT use absolute /api paths (breaks reverse proxy)
         assert 'fetch("/api' not in js
 
@@ -221,53 +292,31 @@ class TestEpisodeEndpoints:
 # ---------------------------------------------------------------------------
 
 class TestPipelineActions:
-    def test_detect_endpoint_sync(self, client):
+    def test_detect_endpoint_sync(self, client, monkeypatch):
         """Detect stays synchronous."""
         mock_result = MagicMock(found=5, new=2, total=10)
-        with patch("btcedu.core.detector.detect_episodes", return_value=mock_result):
-            r = client.post("/api/detect")
-            assert r.status_code == 200
-            data = r.get_json()
-            assert data["success"] is True
-            assert data["new"] == 2
-
-    def test_download_returns_202(self, client):
-        r = client.post("/api/episodes/ep002/download", json={"force": False})
-        assert r.status_code == 202
-        data = r.get_json()
-        assert "job_id" in data
-        assert data["state"] in ("queued", "running")
-
-    def test_transcribe_returns_202(self, client):
-        r = client.post("/api/episodes/ep002/transcribe", json={"force": False})
-        assert r.status_code == 202
-        assert "job_id" in r.get_json()
-
-    def test_chunk_returns_202(self, client):
-        r = client.post("/api/episodes/ep002/chunk", json={"force": False})
-        assert r.status_code == 202
-        assert "job_id" in r.get_json()
-
-    def test_generate_returns_202(self, client):
-        r = client.post(
-            "/api/episodes/ep003/generate",
-            json={"force": True, "dry_run": False},
-        )
-        assert r.status_code == 202
-        assert "job_id" in r.get_json()
+        monkeypatch.setattr(detector, "detect_episodes", lambda session, settings: mock_result)
 
-    def test_run_returns_202(self, client):
-        r = client.post("/api/episodes/ep002/run", json={"force": False})
-        assert r.status_code == 202
-        assert "job_id" in r.get_json()
-
-    def test_refine_returns_202(self, client):
-        r = client.post("/api/episodes/ep001/refine", json={"force": False})
-        assert r.status_code == 202
-        assert "job_id" in r.get_json()
-
-    def test_retry_returns_202(self, client):
-        r = client.post("/api/episodes/ep003/retry")
+        r = client.post("/api/detect")
+        assert r.status_code == 200
+        data = r.get_json()
+        assert data["success"] is True
+        assert data["new"] == 2
+
+    @pytest.mark.parametrize(
+        "path, body",
+        [
+            pytest.param("ep002/download", {"force": False}, id="download"),
+            pytest.param("ep002/transcribe", {"force": False}, id="transcribe"),
+            pytest.param("ep002/chunk", {"force": False}, id="chunk"),
+            pytest.param("ep003/generate", {"force": True, "dry_run": False}, id="generate"),
+            pytest.param("ep002/run", {"force": False}, id="run"),
+            pytest.param("ep001/refine", {"force": False}, id="refine"),
+            pytest.param("ep003/retry", None, id="retry"),
+        ],
+    )
+    def test_action_returns_202(self, client, path, body):
+        r = client.post(f"/api/episodes/{path}", json=body)
         assert r.status_code == 202
         assert "job_id" in r.get_json()
 
@@ -277,7 +326,7 @@ class TestPipelineActions:
 # ---------------------------------------------------------------------------
 
 class TestJobsAndLogs:
-    def test_job_lifecycle_queued_to_success(self, client, app):
+    def test_job_lifecycle_queued_to_success(self, client, app, monkeypatch):
         """Submit a job, poll it, verify it completes."""
         event = threading.Event()
 
@@ -285,43 +334,37 @@ class TestJobsAndLogs:
             event.wait(timeout=5)
             return "/tmp/audio.m4a"
 
-        with patch("btcedu.core.detector.download_episode", side_effect=mock_download):
-            r = client.post("/api/episodes/ep002/download", json={})
-            assert r.status_code == 202
-            job_id = r.get_json()["job_id"]
+        monkeypatch.setattr(detector, "download_episode", mock_download)
 
-            # Poll: should be queued or running
-            r2 = client.get(f"/api/jobs/{job_id}")
-            assert r2.status_code == 200
-            assert r2.get_json()["state"] in ("queued", "running")
+        r = client.post("/api/episodes/ep002/download", json={})
+        assert r.status_code == 202
+        job_id = r.get_json()["job_id"]
 
-            # Let the job finish
-            event.set()
-            time.sleep(0.5)
+        # Poll: should be queued or running
+        r2 = client.get(f"/api/jobs/{job_id}")
+        assert r2.status_code == 200
+        assert r2.get_json()["state"] in ("queued", "running")
 
-            # Poll: should be success
-            r3 = client.get(f"/api/jobs/{job_id}")
-            assert r3.status_code == 200
-            data = r3.get_json()
-            assert data["state"] == "success"
-            assert data["result"]["path"] == "/tmp/audio.m4a"
+        # Let the job finish
+        event.set()
+        data = wait_for_job(client, app, job_id)
+        assert data["state"] == "success"
+        assert data["result"]["path"] == "/tmp/audio.m4a"
 
-    def test_job_error_state(self, client, app):
+    def test_job_error_state(self, client, app, monkeypatch):
         """Job that raises exception ends in error state."""
-        with patch(
-            "btcedu.core.detector.download_episode",
-            side_effect=RuntimeError("Download failed"),
-        ):
-            r = client.post("/api/episodes/ep002/download", json={})
-            job_id = r.get_json()["job_id"]
-            time.sleep(0.5)
-
-            r2 = client.get(f"/api/jobs/{job_id}")
-            data = r2.get_json()
-            assert data["state"] == "error"
-            assert "Download failed" in data["message"]
-
-    def test_active_job_prevents_duplicate(self, client, app):
+
+        def mock_download(session, episode_id, settings, force=False):
+            raise RuntimeError("Download failed")
+
+        monkeypatch.setattr(detector, "download_episode", mock_download)
+
+        r = client.post("/api/episodes/ep002/download", json={})
+        data = wait_for_job(client, app, r.get_json()["job_id"])
+        assert data["state"] == "error"
+        assert "Download failed" in data["message"]
+
+    def test_active_job_prevents_duplicate(self, client, app, monkeypatch):
         """409 when submitting while a job is active for same episode."""
         event = threading.Event()
 
@@ -329,45 +372,61 @@ class TestJobsAndLogs:
             event.wait(timeout=5)
             return "/tmp/audio.m4a"
 
-        with patch("btcedu.core.detector.download_episode", side_effect=mock_download):
-            r1 = client.post("/api/episodes/ep002/download", json={})
-            assert r1.status_code == 202
+        monkeypatch.setattr(detector, "download_episode", mock_download)
 
-            # Second attempt should be blocked
-            r2 = client.post("/api/episodes/ep002/transcribe", json={})
-            assert r2.status_code == 409
-            assert "already active" in r2.get_json()["error"]
+        r1 = client.post("/api/episodes/ep002/download", json={})
+        assert r1.status_code == 202
 
-            event.set()
-            time.sleep(0.5)
+        # Second attempt should be blocked
+        r2 = client.post("/api/episodes/ep002/transcribe", json={})
+        assert r2.status_code == 409
+        assert "already active" in r2.get_json()["error"]
+
+        event.set()
+        wait_for_job(client, app, r1.get_json()["job_id"])
+
+    def test_finished_job_releases_episode(self, client, app, monkeypatch):
+        """A finished job no longer blocks new submissions for the episode."""
+        monkeypatch.setattr(detector, "download_episode", _instant_download)
+
+        r = client.post("/api/episodes/ep002/download", json={})
+        assert r.status_code == 202
+        wait_for_job(client, app, r.get_json()["job_id"])
+
+        mgr = app.config["job_manager"]
+        assert mgr.active_for_episode("ep002") is None
+        r2 = client.post("/api/episodes/ep002/download", json={})
+        assert r2.status_code == 202
+        wait_for_job(client, app, r2.get_json()["job_id"])
+
+    def test_old_finished_jobs_evicted(self, tmp_path):
+        """Finished jobs past the retention window are dropped on submit."""
+        mgr = JobManager(str(tmp_path / "logs"))
+        stale = Job(job_id="old", episode_id="ep001", action="download", state="success")
+        stale.updated_at -= JOB_RETENTION * 2
+        mgr._jobs["old"] = stale
+        with mgr._lock:
+            mgr._evict_finished()
+        assert mgr.get("old") is None
+        mgr.shutdown()
 
     def test_job_not_found(self, client):
         r = client.get("/api/jobs/nonexistent")
         assert r.status_code == 404
 
-    def test_job_includes_episode_status(self, client, app):
+    def test_job_includes_episode_status(self, client, app, monkeypatch):
         """Job response includes episode_status from DB."""
-        with patch(
-            "btcedu.core.detector.download_episode",
-            return_value="/tmp/audio.m4a",
-        ):
-            r = client.post("/api/episodes/ep002/download", json={})
-            job_id = r.get_json()["job_id"]
-            time.sleep(0.5)
-
-            r2 = client.get(f"/api/jobs/{job_id}")
-            data = r2.get_json()
-            assert "episode_status" in data
+        monkeypatch.setattr(detector, "download_episode", _instant_download)
+
+        r = client.post("/api/episodes/ep002/download", json={})
+        data = wait_for_job(client, app, r.get_json()["job_id"])
+        assert "episode_status" in data
 
     def test_action_log_endpoint(self, client, test_settings):
         """Action log returns lines from per-episode log file."""
         log_dir = Path(test_settings.logs_dir) / "episodes"
         log_dir.mkdir(parents=True, exist_ok=True)
-        (log_dir / "ep001.log").write_text(
-            "2026-02-12 10:00:00 [download] Starting...\n"
-            "2026-02-12 10:00:05 [download] Complete\n",
-            encoding="utf-8",
-        )
+        (log_dir / "ep001.log").write_bytes(ACTION_LOG)
 
         r = client.get("/api/episodes/ep001/action-log")
         assert r.status_code == 200
@@ -385,8 +444,7 @@ class TestJobsAndLogs:
         """Tail parameter limits returned lines."""
         log_dir = Path(test_settings.logs_dir) / "episodes"
         log_dir.mkdir(parents=True, exist_ok=True)
-        lines = "\n".join(f"line {i}" for i in range(50)) + "\n"
-        (log_dir / "ep001.log").write_text(lines, encoding="utf-8")
+        (log_dir / "ep001.log").write_bytes(TAIL_LOG)
 
         r = client.get("/api/episodes/ep001/action-log?tail=5")
         assert r.status_code == 200
@@ -404,11 +462,7 @@ class TestJobsAndLogs:
 
         r = client.post("/api/episodes/ep001/run", json={})
         assert r.status_code == 202
-        job_id = r.get_json()["job_id"]
-        time.sleep(0.5)
-
-        r2 = client.get(f"/api/jobs/{job_id}")
-        data = r2.get_json()
+        data = wait_for_job(client, app, r.get_json()["job_id"])
         assert data["state"] == "success"
         assert data["result"]["message"] == "Nothing to do"
 
@@ -418,11 +472,11 @@ class TestJobsAndLogs:
 # ---------------------------------------------------------------------------
 
 class TestFileViewer:
-    def test_file_transcript(self, client, test_settings, tmp_path):
+    def test_file_transcript(self, client, test_settings):
         # Create a fake transcript file
         ep_dir = Path(test_settings.transcripts_dir) / "ep001"
         ep_dir.mkdir(parents=True)
-        (ep_dir / "transcript.clean.de.txt").write_text("Hallo Welt", encoding="utf-8")
+        (ep_dir / "transcript.clean.de.txt").write_bytes(b"Hallo Welt")
 
         r = client.get("/api/episodes/ep001/files/transcript_clean")
         assert r.status_code == 200
@@ -432,7 +486,7 @@ class TestFileViewer:
     def test_file_json_pretty_printed(self, client, test_settings):
         ep_dir = Path(test_settings.outputs_dir) / "ep001"
         ep_dir.mkdir(parents=True)
-        (ep_dir / "qa.json").write_text('{"q":"What?","a":"Yes"}', encoding="utf-8")
+        (ep_dir / "qa.json").write_bytes(b'{"q":"What?","a":"Yes"}')
 
         r = client.get("/api/episodes/ep001/files/qa")
         assert r.status_code == 200
@@ -451,14 +505,13 @@ class TestFileViewer:
     def test_file_report(self, client, test_settings):
         rep_dir = Path(test_settings.reports_dir) / "ep001"
         rep_dir.mkdir(parents=True)
-        report_data = {"success": True, "episode_id": "ep001"}
-        (rep_dir / "report_20260101_120000.json").write_text(
-            json.dumps(report_data), encoding="utf-8",
+        (rep_dir / "report_20260101_120000.json").write_bytes(
+            b'{"success": true, "episode_id": "ep001"}'
         )
 
         r = client.get("/api/episodes/ep001/files/report")
         assert r.status_code == 200
-        content = json.loads(r.get_json()["content"])
+        content = orjson.loads(r.get_json()["content"])
         assert content["success"] is True
 
 